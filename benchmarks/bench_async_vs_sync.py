@@ -0,0 +1,249 @@
+"""
+Benchmark: requests/sec and tail latency of the sync and asyncio builds
+
+Seeds a scratch database, starts app.py on gunicorn and app_async.py on
+gunicorn with uvicorn workers (same number of workers, page cache and
+admission control off so every request reaches MongoDB), and drives
+closed-loop HTTP/1.1 keep-alive load (each client sends its next request as
+soon as the previous response arrives) at / and /all on several concurrency
+levels. Both builds talk to MongoDB through a TCP proxy that can hold every
+reply for a while, so the run is repeated with MongoDB answering at full speed
+and with it slowed down, which is where the asyncio build is meant to pay off.
+
+Usage:
+    docker-compose up -d mongodb
+    python benchmarks/bench_async_vs_sync.py
+    python benchmarks/bench_async_vs_sync.py --concurrency 10 100 500 --duration 20 --mongodb-delay-ms 0 50
+
+The load generator only uses the standard library. The benchmark writes to a
+scratch database (BENCH_DBNAME, default taskdb_bench) which is dropped when
+it finishes.
+"""
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import subprocess
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from pymongo import MongoClient
+
+BENCH_URI = os.getenv('BENCH_MONGODB_URI', 'mongodb://localhost:27017')
+BENCH_DBNAME = os.getenv('BENCH_DBNAME', 'taskdb_bench')
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+PROXY_PORT = 27118
+SYNC_PORT = 5060
+ASYNC_PORT = 5061
+
+
+class LatencyProxy:
+    """TCP proxy to MongoDB that holds each reply for `delay` seconds"""
+
+    def __init__(self, upstream_host, upstream_port):
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.delay = 0.0
+
+    async def pump(self, reader, writer, delayed):
+        try:
+            while data := await reader.read(65536):
+                if delayed and self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(
+                self.upstream_host, self.upstream_port)
+        except OSError:
+            client_writer.close()
+            return
+        try:
+            await asyncio.gather(self.pump(client_reader, upstream_writer, delayed=False),
+                                 self.pump(upstream_reader, client_writer, delayed=True))
+        except asyncio.CancelledError:
+            pass  # connections still open when the run ends
+
+    async def start(self, port):
+        return await asyncio.start_server(self.handle, '127.0.0.1', port)
+
+
+def seed(collection, count):
+    """Fill the collection with `count` tasks, a third of them completed"""
+    collection.drop()
+    base = datetime.utcnow() - timedelta(seconds=count)
+    collection.insert_many([
+        {
+            'title': f'Benchmark task {i}',
+            'completed': i % 3 == 0,
+            'created_at': base + timedelta(seconds=i),
+            'created_by_pod': 'bench'
+        }
+        for i in range(count)
+    ])
+
+
+def start_build(command, port, env):
+    """Run one build on gunicorn and wait until it answers /ready"""
+    process = subprocess.Popen(command, cwd=SRC_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/ready', timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{command[-1]} did not become ready')
+
+
+def start_builds(workers, threads):
+    """Start the sync and asyncio builds, both talking to MongoDB through the proxy"""
+    env = dict(os.environ,
+               MONGODB_URI=f'mongodb://127.0.0.1:{PROXY_PORT}/?directConnection=true',
+               MONGODB_DBNAME=BENCH_DBNAME,
+               GUNICORN_WORKERS=str(workers),
+               GUNICORN_THREADS=str(threads),
+               GUNICORN_MAX_REQUESTS='0',
+               PAGE_CACHE_SIZE='0',
+               ADMISSION_CONTROL_ENABLED='false')
+    sync = start_build(['gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+                       SYNC_PORT, dict(env, PORT=str(SYNC_PORT)))
+    try:
+        async_ = start_build(['gunicorn', '-k', 'uvicorn.workers.UvicornWorker',
+                              '--bind', f'127.0.0.1:{ASYNC_PORT}', '--workers', str(workers),
+                              'app_async:app'],
+                             ASYNC_PORT, env)
+    except RuntimeError:
+        sync.terminate()
+        raise
+    return sync, async_
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns the status code"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, request, deadline, latencies, errors):
+    """One keep-alive connection sending requests back to back until the deadline"""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            if status >= 400:
+                errors.append(status)
+            else:
+                latencies.append((time.perf_counter() - start) * 1000)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url, path, concurrency, duration):
+    """Return (requests/sec, p50 ms, p99 ms, error count)"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    request = (f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+               f'Connection: keep-alive\r\n\r\n').encode()
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(client(host, port, request, deadline, latencies, errors)
+                           for _ in range(concurrency)))
+    if not latencies:
+        return 0.0, None, None, len(errors)
+    latencies.sort()
+    return (len(latencies) / duration, statistics.median(latencies),
+            latencies[math.ceil(len(latencies) * 0.99) - 1], len(errors))
+
+
+async def run(args):
+    parts = urlsplit(BENCH_URI)
+    proxy = LatencyProxy(parts.hostname or 'localhost', parts.port or 27017)
+    server = await proxy.start(PROXY_PORT)
+    processes = await asyncio.to_thread(start_builds, args.workers, args.threads)
+    builds = (('sync', f'http://127.0.0.1:{SYNC_PORT}'), ('async', f'http://127.0.0.1:{ASYNC_PORT}'))
+    try:
+        print(f"{'mongodb +ms':>11} {'path':>5} {'build':>6} {'clients':>8} "
+              f"{'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for delay_ms in args.mongodb_delay_ms:
+            proxy.delay = delay_ms / 1000
+            for path in args.paths:
+                for concurrency in args.concurrency:
+                    for name, url in builds:
+                        rps, p50, p99, errors = await run_load(url, path, concurrency, args.duration)
+                        p50 = f'{p50:>8.2f}' if p50 is not None else f"{'-':>8}"
+                        p99 = f'{p99:>8.2f}' if p99 is not None else f"{'-':>8}"
+                        print(f"{delay_ms:>11g} {path:>5} {name:>6} {concurrency:>8} "
+                              f"{rps:>9.1f} {p50} {p99} {errors:>7}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            await asyncio.to_thread(process.wait)
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--paths', nargs='+', default=['/', '/all'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50, 200])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--mongodb-delay-ms', type=float, nargs='+', default=[0, 20])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    client = MongoClient(BENCH_URI)
+    try:
+        seed(client[BENCH_DBNAME].tasks, args.tasks)
+        asyncio.run(run(args))
+    finally:
+        client.drop_database(BENCH_DBNAME)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark: task list + statistics query for index()
+
+Compares three ways to build index() at 10k, 100k and 1M tasks, each
+fetching a page from the middle of the list (keyset cursor):
+
+    legacy   load every task and count in Python
+    facet    one $facet aggregation holding the keyset page and the counters
+    find     the page as an indexed find(), the counters in a separate
+             aggregation (the shape index() runs, except that the counters
+             now come from the task_stats document)
+
+$facet sub-pipelines cannot use indexes, so the facet path scans and sorts
+the whole collection for the page as well as for the counters; its time
+grows with the collection while the find path's page stays a range scan of
+page_size + 1 index keys.
+
+Usage:
+    docker-compose up -d mongodb
+    python benchmarks/bench_index_query.py
+    python benchmarks/bench_index_query.py --sizes 10000 100000 --runs 10
+
+The benchmark writes to a scratch database (BENCH_DBNAME, default
+taskdb_bench) which is dropped when it finishes.
+"""
+import argparse
+import math
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+BENCH_URI = os.getenv('BENCH_MONGODB_URI', 'mongodb://localhost:27017')
+BENCH_DBNAME = os.getenv('BENCH_DBNAME', 'taskdb_bench')
+PAGE_SIZE = 50
+
+
+def seed(collection, count, batch_size=10000):
+    """Fill the collection with `count` tasks, a third of them completed"""
+    collection.drop()
+    base = datetime.utcnow() - timedelta(seconds=count)
+    for start in range(0, count, batch_size):
+        collection.insert_many([
+            {
+                'title': f'Benchmark task {i}',
+                'completed': i % 3 == 0,
+                'created_at': base + timedelta(seconds=i),
+                'created_by_pod': 'bench'
+            }
+            for i in range(start, min(start + batch_size, count))
+        ], ordered=False)
+    collection.create_index([('created_at', -1), ('_id', -1)])
+    collection.create_index([('completed', 1), ('created_at', -1)])
+
+
+def middle_cursor(collection):
+    """(created_at, _id) of the task halfway down the list, as a page cursor"""
+    count = collection.estimated_document_count()
+    task = next(collection.find({}, {'created_at': 1})
+                .sort([('created_at', -1), ('_id', -1)]).skip(count // 2).limit(1))
+    return task['created_at'], task['_id']
+
+
+def page_query(after):
+    """Keyset filter for the page older than `after`, as build_page_query() makes it"""
+    created_at, task_id = after
+    return {'$or': [
+        {'created_at': {'$lt': created_at}},
+        {'created_at': created_at, '_id': {'$lt': task_id}}
+    ]}
+
+
+def legacy_path(collection, after):
+    """Original index(): materialize every task and count in Python"""
+    tasks = list(collection.find({}).sort('created_at', -1))
+    total = len(tasks)
+    completed = sum(1 for task in tasks if task.get('completed', False))
+    return total, completed
+
+
+def facet_path(collection, after):
+    """One $facet round trip for the keyset page and the counters (no index use)"""
+    pipeline = [
+        {'$facet': {
+            'page': [{'$match': page_query(after)},
+                     {'$sort': {'created_at': -1, '_id': -1}},
+                     {'$limit': PAGE_SIZE + 1}],
+            'total': [{'$count': 'count'}],
+            'completed': [{'$match': {'completed': True}}, {'$count': 'count'}]
+        }}
+    ]
+    result = next(collection.aggregate(pipeline))
+    return result['total'][0]['count'], result['completed'][0]['count']
+
+
+def find_path(collection, after):
+    """The page as an indexed find(), the counters in their own aggregation"""
+    list(collection.find(page_query(after))
+         .sort([('created_at', -1), ('_id', -1)])
+         .limit(PAGE_SIZE + 1))
+    pipeline = [
+        {'$facet': {
+            'total': [{'$count': 'count'}],
+            'completed': [{'$match': {'completed': True}}, {'$count': 'count'}]
+        }}
+    ]
+    result = next(collection.aggregate(pipeline))
+    return result['total'][0]['count'], result['completed'][0]['count']
+
+
+def measure(func, collection, after, runs):
+    """Return (median ms, p95 ms) over `runs` calls"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(collection, after)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[math.ceil(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    client = MongoClient(BENCH_URI)
+    collection = client[BENCH_DBNAME].tasks
+    try:
+        print(f"{'tasks':>10} {'path':>8} {'median ms':>10} {'p95 ms':>10}")
+        for size in args.sizes:
+            seed(collection, size)
+            after = middle_cursor(collection)
+            assert legacy_path(collection, after) == facet_path(collection, after) == find_path(collection, after)
+            for name, func in (('legacy', legacy_path), ('facet', facet_path), ('find', find_path)):
+                median, p95 = measure(func, collection, after, args.runs)
+                print(f"{size:>10} {name:>8} {median:>10.1f} {p95:>10.1f}")
+    finally:
+        client.drop_database(BENCH_DBNAME)
+
+
+if __name__ == '__main__':
+    main()
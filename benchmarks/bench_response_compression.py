@@ -0,0 +1,112 @@
+"""
+Benchmark: bytes on the wire and CPU cost of response compression
+
+Renders the task list page (index.html) with 1k and 10k synthetic tasks and
+compresses it with each encoding setting the app supports, reporting the
+compressed size, ratio and the CPU time to compress (median over several runs)
+and to decompress (what the browser pays).
+
+Usage:
+    python benchmarks/bench_response_compression.py
+    python benchmarks/bench_response_compression.py --sizes 1000 10000 50000 --runs 20
+
+No MongoDB is needed: the page is rendered from in-memory tasks with the
+app's own template. brotli settings are skipped if the package is missing.
+"""
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from flask import render_template  # noqa: E402
+from app import app  # noqa: E402
+from compression import ResponseCompressor, brotli  # noqa: E402
+
+SETTINGS = [
+    ('gzip-1', 'gzip', {'gzip_level': 1}),
+    ('gzip-6', 'gzip', {'gzip_level': 6}),
+    ('gzip-9', 'gzip', {'gzip_level': 9}),
+    ('br-1', 'br', {'brotli_quality': 1}),
+    ('br-4', 'br', {'brotli_quality': 4}),
+    ('br-6', 'br', {'brotli_quality': 6}),
+    ('br-11', 'br', {'brotli_quality': 11}),
+]
+
+
+def render_page(count):
+    """The task list page for `count` tasks, as index() renders it"""
+    base = datetime.utcnow() - timedelta(seconds=count)
+    tasks = [
+        {
+            '_id': ObjectId(),
+            'title': f'Benchmark task {i}: review the deployment checklist',
+            'completed': i % 3 == 0,
+            'created_at': base + timedelta(seconds=i),
+            'created_by_pod': 'task-manager-7d8f9b5c-abc12'
+        }
+        for i in reversed(range(count))
+    ]
+    with app.test_request_context('/'):
+        return render_template('index.html',
+                               tasks=tasks,
+                               total_tasks=count,
+                               completed_tasks=(count + 2) // 3,
+                               pending_tasks=count - (count + 2) // 3,
+                               next_cursor=None,
+                               prev_cursor=None,
+                               page_size=count,
+                               pod_name='task-manager-7d8f9b5c-abc12',
+                               pod_ip='10.0.0.12').encode()
+
+
+def decompress(body, encoding):
+    """What the browser does with the response"""
+    if encoding == 'br':
+        return brotli.decompress(body)
+    return gzip.decompress(body)
+
+
+def cpu_ms(func, runs):
+    """Median CPU time of func() in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.process_time()
+        func()
+        timings.append((time.process_time() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'tasks':>7} {'setting':>8} {'KB':>9} {'ratio':>7} {'compress ms':>12} {'decompress ms':>14}")
+    for size in args.sizes:
+        page = render_page(size)
+        render_ms = cpu_ms(lambda: render_page(size), max(1, args.runs // 5))
+        print(f"{size:>7} {'identity':>8} {len(page) / 1024:>9.1f} {1:>7.1f} {'-':>12} {'-':>14}"
+              f"   (render {render_ms:.1f} ms)")
+        for name, encoding, options in SETTINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            compressor = ResponseCompressor(**options)
+            # Highest brotli qualities are slow on large pages; fewer runs keep this short
+            runs = args.runs if options.get('brotli_quality', 0) < 10 else max(1, args.runs // 5)
+            body = compressor.compress(page, encoding)
+            compress_ms = cpu_ms(lambda: compressor.compress(page, encoding), runs)
+            decompress_ms = cpu_ms(lambda: decompress(body, encoding), runs)
+            print(f"{size:>7} {name:>8} {len(body) / 1024:>9.1f} {len(page) / len(body):>7.1f} "
+                  f"{compress_ms:>12.2f} {decompress_ms:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
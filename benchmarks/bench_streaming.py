@@ -0,0 +1,136 @@
+"""
+Benchmark: streamed vs buffered rendering of the complete task list
+
+Measures time-to-first-byte, total render time and peak RSS when rendering
+every task, comparing the streaming /all route (cursor fed lazily into
+stream_template) with a buffered render of the same template (whole list and
+whole HTML string in memory, as index() originally did).
+
+Usage:
+    docker-compose up -d mongodb
+    python benchmarks/bench_streaming.py
+    python benchmarks/bench_streaming.py --tasks 100000 --runs 3
+
+Each measurement runs in a fresh subprocess so peak RSS is not polluted by
+the previous run. The benchmark writes to a scratch database (BENCH_DBNAME,
+default taskdb_bench) which is dropped when it finishes.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+BENCH_URI = os.getenv('BENCH_MONGODB_URI', 'mongodb://localhost:27017')
+BENCH_DBNAME = os.getenv('BENCH_DBNAME', 'taskdb_bench')
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def seed(collection, count, batch_size=10000):
+    """Fill the collection with `count` tasks, a third of them completed"""
+    collection.drop()
+    base = datetime.utcnow() - timedelta(seconds=count)
+    for start in range(0, count, batch_size):
+        collection.insert_many([
+            {
+                'title': f'Benchmark task {i}',
+                'completed': i % 3 == 0,
+                'created_at': base + timedelta(seconds=i),
+                'created_by_pod': 'bench'
+            }
+            for i in range(start, min(start + batch_size, count))
+        ], ordered=False)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode):
+    """Render the task list once in this process and print the measurements as JSON"""
+    os.environ.update({
+        'MONGODB_URI': BENCH_URI,
+        'MONGODB_DBNAME': BENCH_DBNAME,
+        'CREATE_INDEXES_ON_STARTUP': 'false',
+        'PAGE_CACHE_SIZE': '0',
+        'EVENTS_ENABLED': 'false'
+    })
+    sys.path.insert(0, SRC_DIR)
+    import app as task_app
+    from flask import render_template
+
+    # The app connects lazily on its first request; connect up front so both
+    # modes start with an open client and the connection is not timed
+    task_app.ensure_db()
+
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'streamed':
+        response = task_app.app.test_client().get('/all', buffered=False)
+        chunks = iter(response.response)
+        size = len(next(chunks))
+        ttfb = time.perf_counter() - start
+        size += sum(len(chunk) for chunk in chunks)
+        response.close()
+    else:
+        with task_app.app.test_request_context('/'):
+            tasks = list(task_app.tasks_collection.find({}).sort('created_at', -1))
+            total_tasks = len(tasks)
+            completed_tasks = sum(1 for task in tasks if task.get('completed', False))
+            html = render_template('index.html',
+                                   tasks=tasks,
+                                   total_tasks=total_tasks,
+                                   completed_tasks=completed_tasks,
+                                   pending_tasks=total_tasks - completed_tasks,
+                                   pod_name='bench',
+                                   pod_ip='bench')
+            size = len(html.encode())
+        # Nothing can be sent before the whole page is rendered
+        ttfb = time.perf_counter() - start
+    total = time.perf_counter() - start
+
+    print(json.dumps({
+        'ttfb_ms': ttfb * 1000,
+        'total_ms': total * 1000,
+        'bytes': size,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_growth_mb': peak_rss_mb() - baseline_rss
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--child', choices=['streamed', 'buffered'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    client = MongoClient(BENCH_URI)
+    try:
+        seed(client[BENCH_DBNAME].tasks, args.tasks)
+        print(f"{args.tasks} tasks")
+        print(f"{'mode':>9} {'ttfb ms':>9} {'total ms':>9} {'MB sent':>8} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+        for mode in ('buffered', 'streamed'):
+            for _ in range(args.runs):
+                output = subprocess.run([sys.executable, __file__, '--child', mode],
+                                        check=True, capture_output=True, text=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{mode:>9} {result['ttfb_ms']:>9.1f} {result['total_ms']:>9.1f} "
+                      f"{result['bytes'] / 1e6:>8.1f} {result['peak_rss_mb']:>12.1f} "
+                      f"{result['rss_growth_mb']:>14.1f}")
+    finally:
+        client.drop_database(BENCH_DBNAME)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark: MongoDB wire compression for the index() queries
+
+For each compressor setting (none, zlib at several levels, snappy, zstd) and
+collection size, measures latency and bytes on the wire for:
+  - page:  what index() runs per request (one 50-task page + the stats lookup)
+  - all:   the full task list read by the streamed /all view
+
+Bytes are taken from the server's serverStatus network counters
+(physicalBytesOut is what actually crossed the wire, bytesOut is before
+compression), so run it against a MongoDB instance nothing else is using.
+The counters are read over a separate uncompressed connection, and the size
+of one serverStatus reply (which the counters include) is measured up front
+and subtracted.
+
+Usage:
+    docker-compose up -d mongodb
+    python benchmarks/bench_wire_compression.py
+    python benchmarks/bench_wire_compression.py --sizes 1000 10000 --runs 10
+
+snappy needs the python-snappy package; unavailable compressors are skipped.
+The benchmark writes to a scratch database (BENCH_DBNAME, default
+taskdb_bench) which is dropped when it finishes.
+"""
+import argparse
+import math
+import os
+import statistics
+import time
+import warnings
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+BENCH_URI = os.getenv('BENCH_MONGODB_URI', 'mongodb://localhost:27017')
+BENCH_DBNAME = os.getenv('BENCH_DBNAME', 'taskdb_bench')
+PAGE_SIZE = 50
+
+SETTINGS = [
+    ('none', {}),
+    ('zlib-1', {'compressors': 'zlib', 'zlibCompressionLevel': 1}),
+    ('zlib-6', {'compressors': 'zlib', 'zlibCompressionLevel': 6}),
+    ('zlib-9', {'compressors': 'zlib', 'zlibCompressionLevel': 9}),
+    ('snappy', {'compressors': 'snappy'}),
+    ('zstd', {'compressors': 'zstd'}),
+]
+
+
+def seed(db, count, batch_size=10000):
+    """Fill the tasks collection with `count` tasks and build the stats document"""
+    db.tasks.drop()
+    db.task_stats.drop()
+    base = datetime.utcnow() - timedelta(seconds=count)
+    for start in range(0, count, batch_size):
+        db.tasks.insert_many([
+            {
+                'title': f'Benchmark task {i}: review the deployment checklist',
+                'completed': i % 3 == 0,
+                'created_at': base + timedelta(seconds=i),
+                'created_by_pod': 'task-manager-7d8f9b5c-abc12'
+            }
+            for i in range(start, min(start + batch_size, count))
+        ], ordered=False)
+    db.tasks.create_index([('created_at', -1), ('_id', -1)])
+    db.task_stats.insert_one({'_id': 'tasks', 'total': count, 'completed': (count + 2) // 3, 'version': 1})
+
+
+def page_query(db):
+    """index(): one page of tasks plus the counters document"""
+    list(db.tasks.find({}).sort([('created_at', -1), ('_id', -1)]).limit(PAGE_SIZE + 1))
+    db.task_stats.find_one({'_id': 'tasks'})
+
+
+def all_query(db):
+    """/all: every task, newest first"""
+    for _ in db.tasks.find({}).sort([('created_at', -1), ('_id', -1)]).batch_size(500):
+        pass
+
+
+def network_out(admin_db):
+    """(logical bytesOut, physicalBytesOut) sent by the server so far"""
+    network = admin_db.command('serverStatus')['network']
+    return network['bytesOut'], network.get('physicalBytesOut', network['bytesOut'])
+
+
+def status_overhead(admin_db, samples=5):
+    """
+    (logical, wire) bytes that reading the counters adds between two reads:
+    the reply to the first serverStatus is counted by the second
+    """
+    deltas = []
+    for _ in range(samples):
+        logical_before, wire_before = network_out(admin_db)
+        logical_after, wire_after = network_out(admin_db)
+        deltas.append((logical_after - logical_before, wire_after - wire_before))
+    return min(deltas)
+
+
+def measure(client, status_admin, overhead, query, runs):
+    """Return (median ms, p95 ms, logical bytes/run, wire bytes/run)"""
+    db = client[BENCH_DBNAME]
+    query(db)  # warm up the connection and the server cache
+    logical_before, wire_before = network_out(status_admin)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        query(db)
+        timings.append((time.perf_counter() - start) * 1000)
+    logical_after, wire_after = network_out(status_admin)
+    timings.sort()
+    logical_overhead, wire_overhead = overhead
+    return (statistics.median(timings), timings[math.ceil(len(timings) * 0.95) - 1],
+            (logical_after - logical_before - logical_overhead) / runs,
+            (wire_after - wire_before - wire_overhead) / runs)
+
+
+def compressed_client(options):
+    """
+    MongoClient with the given compression options, or None when pymongo
+    cannot use the requested compressor (it warns and drops it when the
+    package is missing)
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        client = MongoClient(BENCH_URI, **options)
+    if any('compression' in str(warning.message) for warning in caught):
+        client.close()
+        return None
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    # Uncompressed and separate from the measured clients, so reading the
+    # counters costs the same for every setting
+    setup = MongoClient(BENCH_URI)
+    overhead = status_overhead(setup.admin)
+    try:
+        print(f"{'tasks':>8} {'query':>5} {'setting':>8} {'median ms':>10} {'p95 ms':>8} "
+              f"{'KB logical':>11} {'KB wire':>9} {'ratio':>6}")
+        for size in args.sizes:
+            seed(setup[BENCH_DBNAME], size)
+            for query_name, query in (('page', page_query), ('all', all_query)):
+                runs = args.runs if query_name == 'page' else max(1, args.runs // 5)
+                for name, options in SETTINGS:
+                    client = compressed_client(options)
+                    if client is None:
+                        continue
+                    try:
+                        median, p95, logical, wire = measure(client, setup.admin, overhead, query, runs)
+                    finally:
+                        client.close()
+                    ratio = logical / wire if wire else 0
+                    print(f"{size:>8} {query_name:>5} {name:>8} {median:>10.2f} {p95:>8.2f} "
+                          f"{logical / 1024:>11.1f} {wire / 1024:>9.1f} {ratio:>6.2f}")
+    finally:
+        setup.drop_database(BENCH_DBNAME)
+        setup.close()
+
+
+if __name__ == '__main__':
+    main()
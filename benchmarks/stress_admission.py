@@ -0,0 +1,185 @@
+"""
+Stress test: admission control while MongoDB slows down
+
+Starts the app on gunicorn behind a TCP proxy that delays every MongoDB reply,
+drives closed-loop load at / and probes /health the way the kubelet does, and
+runs three phases: baseline, slow (replies delayed by --slow-ms) and
+recovered. The whole run is repeated with admission control on and off.
+
+With admission control off, requests pile up behind the slow database, every
+thread is busy and health probes queue behind them until they time out. With
+it on, the excess is shed at once with 503, latency of the admitted requests
+stays bounded and the probes keep answering.
+
+Usage:
+    docker-compose up -d mongodb
+    python benchmarks/stress_admission.py
+    python benchmarks/stress_admission.py --clients 100 --slow-ms 200 --phase-seconds 20
+
+The load generator only uses the standard library. The benchmark writes to a
+scratch database (BENCH_DBNAME, default taskdb_bench) which is dropped when
+it finishes.
+"""
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import subprocess
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+from pymongo import MongoClient
+
+from bench_async_vs_sync import LatencyProxy, read_response, seed
+
+BENCH_URI = os.getenv('BENCH_MONGODB_URI', 'mongodb://localhost:27017')
+BENCH_DBNAME = os.getenv('BENCH_DBNAME', 'taskdb_bench')
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+PROXY_PORT = 27117
+APP_PORT = 5050
+
+
+def start_app(admission_enabled, workers, threads):
+    """Run the app on gunicorn, talking to MongoDB through the proxy"""
+    env = dict(os.environ,
+               MONGODB_URI=f'mongodb://127.0.0.1:{PROXY_PORT}/?directConnection=true',
+               MONGODB_DBNAME=BENCH_DBNAME,
+               PORT=str(APP_PORT),
+               GUNICORN_WORKERS=str(workers),
+               GUNICORN_THREADS=str(threads),
+               ADMISSION_CONTROL_ENABLED=str(admission_enabled).lower(),
+               PAGE_CACHE_SIZE='0',
+               GUNICORN_MAX_REQUESTS='0')
+    process = subprocess.Popen(['gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+                               cwd=SRC_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{APP_PORT}/ready', timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('The app did not become ready')
+
+
+async def load_client(request, deadline, results):
+    """One keep-alive connection sending requests back to back until the deadline"""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', APP_PORT)
+            start = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            results.append((status, (time.perf_counter() - start) * 1000))
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            results.append((None, None))
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def health_prober(deadline, timeout, interval, results):
+    """Probe /health on a fresh connection, as the kubelet does, failing after `timeout`"""
+    request = f'GET /health HTTP/1.1\r\nHost: 127.0.0.1:{APP_PORT}\r\nConnection: close\r\n\r\n'.encode()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection('127.0.0.1', APP_PORT), timeout)
+            writer.write(request)
+            status = await asyncio.wait_for(read_response(reader), timeout)
+            results.append((status, (time.perf_counter() - start) * 1000))
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            results.append((None, None))
+        finally:
+            if writer is not None:
+                writer.close()
+        await asyncio.sleep(interval)
+
+
+def p99(values):
+    values = sorted(values)
+    return values[math.ceil(len(values) * 0.99) - 1] if values else None
+
+
+def summarize(results, health, duration):
+    ok = [latency for status, latency in results if status is not None and status < 400]
+    health_ok = [latency for status, latency in health if status == 200]
+    return {
+        'ok_rps': len(ok) / duration,
+        'shed': sum(1 for status, _ in results if status == 503),
+        'errors': sum(1 for status, _ in results if status is None or (status >= 400 and status != 503)),
+        'p50': statistics.median(ok) if ok else None,
+        'p99': p99(ok),
+        'health_p99': p99(health_ok),
+        'health_failed': len(health) - len(health_ok)
+    }
+
+
+async def run_phases(proxy, args):
+    request = (f'GET / HTTP/1.1\r\nHost: 127.0.0.1:{APP_PORT}\r\n'
+               f'Connection: keep-alive\r\n\r\n').encode()
+    rows = []
+    for phase, delay in (('baseline', 0.0), ('slow', args.slow_ms / 1000), ('recovered', 0.0)):
+        proxy.delay = delay
+        results, health = [], []
+        deadline = time.perf_counter() + args.phase_seconds
+        await asyncio.gather(health_prober(deadline, args.probe_timeout, 0.2, health),
+                             *(load_client(request, deadline, results) for _ in range(args.clients)))
+        rows.append((phase, summarize(results, health, args.phase_seconds)))
+    return rows
+
+
+async def run(admission_enabled, args):
+    parts = urlsplit(BENCH_URI)
+    proxy = LatencyProxy(parts.hostname or 'localhost', parts.port or 27017)
+    server = await proxy.start(PROXY_PORT)
+    process = await asyncio.to_thread(start_app, admission_enabled, args.workers, args.threads)
+    try:
+        return await run_phases(proxy, args)
+    finally:
+        process.terminate()
+        await asyncio.to_thread(process.wait)
+        server.close()
+
+
+def fmt(value, spec='.1f'):
+    return format(value, spec) if value is not None else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--slow-ms', type=float, default=200)
+    parser.add_argument('--phase-seconds', type=float, default=15)
+    parser.add_argument('--probe-timeout', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    client = MongoClient(BENCH_URI)
+    try:
+        seed(client[BENCH_DBNAME].tasks, args.tasks)
+        print(f"{args.clients} clients on /, MongoDB replies delayed {args.slow_ms:g} ms in the slow phase")
+        print(f"{'admission':>9} {'phase':>10} {'ok req/s':>9} {'shed':>6} {'errors':>7} "
+              f"{'p50 ms':>8} {'p99 ms':>8} {'health p99':>11} {'probes failed':>14}")
+        for admission_enabled in (False, True):
+            for phase, row in asyncio.run(run(admission_enabled, args)):
+                print(f"{'on' if admission_enabled else 'off':>9} {phase:>10} {row['ok_rps']:>9.1f} "
+                      f"{row['shed']:>6} {row['errors']:>7} {fmt(row['p50']):>8} {fmt(row['p99']):>8} "
+                      f"{fmt(row['health_p99']):>11} {row['health_failed']:>14}")
+    finally:
+        client.drop_database(BENCH_DBNAME)
+
+
+if __name__ == '__main__':
+    main()
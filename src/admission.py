@@ -0,0 +1,108 @@
+"""
+Adaptive admission control.
+A per-process concurrency limiter in front of the routes. The limit follows
+observed request latency with a gradient rule: while recent latency stays
+near the long-term baseline the limit grows, and when it rises (MongoDB
+slowing down) the limit shrinks in proportion. Requests over the limit are
+rejected at once with 503, so threads stay free for the requests that can
+still complete and for the health probes.
+
+Priorities: critical requests (health and readiness probes) are always
+admitted; low-priority requests (full page renders) only use part of the
+limit, so they are shed first.
+"""
+import math
+import threading
+
+CRITICAL = 'critical'
+NORMAL = 'normal'
+LOW = 'low'
+
+
+class AdaptiveLimiter:
+    """Gradient concurrency limiter with priority classes"""
+
+    def __init__(self, initial_limit=20, min_limit=2, max_limit=200, tolerance=2.0,
+                 noise_floor=0.005, smoothing=0.2, low_priority_share=0.75, baseline_window=1000):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = float(max(self.min_limit, min(max_limit, initial_limit)))
+        self.tolerance = tolerance
+        # Latency rises smaller than this (seconds) are scheduling noise, not a slow database
+        self.noise_floor = noise_floor
+        self.smoothing = smoothing
+        self.low_priority_share = low_priority_share
+        # EWMA weights: the baseline moves over ~baseline_window samples, the
+        # short-term latency over ~10, so one slow request does not move the limit
+        self._long_alpha = 2 / (baseline_window + 1)
+        self._short_alpha = 2 / 11
+        self.long_rtt = None
+        self.short_rtt = None
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = {NORMAL: 0, LOW: 0}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, priority=NORMAL):
+        """Admit a request (returns True) or shed it (returns False)"""
+        with self._lock:
+            if priority == CRITICAL:
+                allowed = True
+            elif priority == LOW:
+                allowed = self.in_flight < max(1, math.floor(self.limit * self.low_priority_share))
+            else:
+                allowed = self.in_flight < math.floor(self.limit)
+            if not allowed:
+                self.shed[priority] += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self, latency, sample=True):
+        """Finish an admitted request; latency (seconds) updates the limit when sample is True"""
+        with self._lock:
+            in_flight = self.in_flight
+            self.in_flight -= 1
+            if sample and latency > 0:
+                self._update(latency, in_flight)
+
+    def _update(self, latency, in_flight):
+        if self.long_rtt is None:
+            self.long_rtt = self.short_rtt = latency
+            return
+        self.short_rtt += self._short_alpha * (latency - self.short_rtt)
+        self.long_rtt += self._long_alpha * (latency - self.long_rtt)
+
+        # Once latency has settled well below the baseline, let the baseline
+        # follow it down quickly instead of over the whole window
+        if self.long_rtt / self.short_rtt > 2:
+            self.long_rtt *= 0.95
+
+        threshold = self.long_rtt * self.tolerance + self.noise_floor
+        # Requests are too few to tell whether more concurrency would help;
+        # keep the limit rather than growing it without evidence
+        if in_flight < self.limit / 2 and self.short_rtt <= threshold:
+            return
+
+        # Over the threshold: shrink in proportion to how far latency has risen.
+        # Within it: grow by sqrt(limit), a step that is large while the limit
+        # is small and cautious once it is large.
+        if self.short_rtt > threshold:
+            new_limit = self.limit * max(0.5, threshold / self.short_rtt)
+        else:
+            new_limit = self.limit + math.sqrt(self.limit)
+        self.limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = float(max(self.min_limit, min(self.max_limit, self.limit)))
+
+    def stats(self):
+        """Return the limiter state and counters as a dict"""
+        with self._lock:
+            return {
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'admitted': self.admitted,
+                'shed': dict(self.shed),
+                'latency_baseline_ms': round(self.long_rtt * 1000, 2) if self.long_rtt is not None else None,
+                'latency_recent_ms': round(self.short_rtt * 1000, 2) if self.short_rtt is not None else None
+            }
@@ -4,13 +4,48 @@ A simple Flask web application for managing tasks with MongoDB backend.
 Demonstrates stateless application architecture on Kubernetes.
 """
 import os
+
+# gevent worker mode: the standard library has to be monkey-patched before
+# pymongo (or anything else that creates sockets, locks or threads) is
+# imported, so MongoDB I/O yields to other greenlets instead of blocking the
+# worker. gunicorn.conf.py patches even earlier, before it preloads the app;
+# this covers the other entry points (python app.py, the flask CLI).
+GEVENT_ENABLED = os.getenv('GUNICORN_WORKER_CLASS') == 'gevent'
+if GEVENT_ENABLED:
+    from gevent import monkey
+    monkey.patch_all()
+
+import json
+import contextvars
+import hashlib
+import random
+import threading
+import time
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, Response, render_template, stream_template, request, redirect, url_for, jsonify, make_response, g
 # from flask_wtf.csrf import CSRFProtect  # Disabled for demo - enable in production
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+import pymongo
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import ConnectionFailure, BulkWriteError, PyMongoError
 from bson.objectid import ObjectId
 import logging
+from page_cache import PageCache
+from task_mirror import TaskMirror
+from task_events import TaskEventHub
+from write_behind import WriteBehindQueue, QueueFull
+from purge import CompletedTaskPurge
+from mongo_monitoring import PoolTelemetry, CommandMetrics
+from compression import ResponseCompressor
+from admission import AdaptiveLimiter, CRITICAL, NORMAL, LOW
+import static_assets
+import metrics
+from tasks_common import (
+    get_secret_key, MONGODB_DBNAME, MONGODB_POOL_OPTIONS, POD_NAME, POD_IP,
+    TASKS_PAGE_SIZE, TASKS_STREAM_BATCH_SIZE, PURGE_BATCH_SIZE, PURGE_THROTTLE_MS,
+    MONGODB_RECONNECT_MIN_DELAY, MONGODB_RECONNECT_MAX_DELAY, TASK_STATS_ID, TASK_COUNTS_PIPELINE,
+    get_connection_string, get_client_options, decode_cursor, parse_page_size,
+    build_page_query, finish_page, reconciled_stats_update, new_task, purge_status_json
+)
 
 # Configure logging
 logging.basicConfig(
@@ -21,58 +56,118 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Security configuration
-# Use SECRET_KEY from environment, or generate a default for development
-# In production, always set SECRET_KEY environment variable
-SECRET_KEY = os.getenv('SECRET_KEY')
-if not SECRET_KEY:
-    logger.warning("SECRET_KEY not set, using insecure default for development")
-    SECRET_KEY = 'dev-insecure-key-change-in-production'
-app.config['SECRET_KEY'] = SECRET_KEY
+app.config['SECRET_KEY'] = get_secret_key()
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 # csrf = CSRFProtect(app)  # Disabled for demo - enable in production
 
-# MongoDB Configuration from environment variables
-# Supports two methods (in priority order):
-# 1. Individual variables: MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_HOSTNAME, MONGODB_PORT, MONGODB_DBNAME (recommended)
-# 2. MONGODB_URI: Full connection string (fallback for backward compatibility)
-MONGODB_USERNAME = os.getenv('MONGODB_USERNAME', '')
-MONGODB_PASSWORD = os.getenv('MONGODB_PASSWORD', '')
-MONGODB_HOSTNAME = os.getenv('MONGODB_HOSTNAME', os.getenv('MONGODB_HOST', 'localhost'))  # Support both new and old names
-MONGODB_PORT = int(os.getenv('MONGODB_PORT', '27017'))
-MONGODB_DBNAME = os.getenv('MONGODB_DBNAME', os.getenv('MONGODB_DATABASE', 'taskdb'))  # Support both new and old names
-MONGODB_URI = os.getenv('MONGODB_URI', '')  # Fallback for backward compatibility
-
-# Pod information for load balancing demonstration
-POD_NAME = os.getenv('HOSTNAME', 'local')
-POD_IP = os.getenv('POD_IP', 'localhost')
-
-# MongoDB connection
+# In gevent mode one worker runs up to GUNICORN_WORKER_CONNECTIONS greenlets,
+# far more than it should hold MongoDB connections. Unless set explicitly, cap
+# the pool and bound the checkout wait, so a slow database makes greenlets
+# queue briefly and then fail instead of piling up without limit.
+GEVENT_POOL_DEFAULTS = {
+    'maxPoolSize': '200',
+    'waitQueueTimeoutMS': '2000',
+    'maxIdleTimeMS': '60000',
+}
+if GEVENT_ENABLED:
+    for name, value in GEVENT_POOL_DEFAULTS.items():
+        MONGODB_POOL_OPTIONS[name] = MONGODB_POOL_OPTIONS[name] or value
+
+# Modules that must be patched for MongoDB calls to be cooperative
+GEVENT_PATCHED_MODULES = ('socket', 'ssl', 'select', 'threading', 'time', 'queue')
+
+# Bulk task API limits
+BULK_MAX_TASKS = int(os.getenv('BULK_MAX_TASKS', '10000'))
+BULK_INSERT_BATCH_SIZE = int(os.getenv('BULK_INSERT_BATCH_SIZE', '1000'))
+
+# Write-behind task creation: create_task queues the insert and returns
+# immediately; a background thread writes queued tasks with insert_many
+WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() == 'true'
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv('WRITE_BEHIND_MAX_QUEUE', '10000'))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '500'))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv('WRITE_BEHIND_FLUSH_MS', '50'))
+WRITE_BEHIND_ENQUEUE_TIMEOUT_MS = int(os.getenv('WRITE_BEHIND_ENQUEUE_TIMEOUT_MS', '100'))
+
+# Response compression (gzip, and brotli when the package is installed)
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+# Rendered page cache (per process); PAGE_CACHE_SIZE=0 disables it
+PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', '256'))
+PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', '30'))
+
+# Serve index() from an in-memory, change-stream-fed mirror of the tasks
+# collection (requires a replica set; falls back to direct queries otherwise)
+TASK_MIRROR_ENABLED = os.getenv('TASK_MIRROR_ENABLED', 'false').lower() == 'true'
+
+# Live updates: /events pushes task changes to the browser as Server-Sent
+# Events, fanned out from one change stream per worker process (requires a
+# replica set). EVENTS_MAX_CLIENTS=0 turns it off.
+EVENTS_MAX_CLIENTS = int(os.getenv('EVENTS_MAX_CLIENTS', '100'))
+EVENTS_ENABLED = os.getenv('EVENTS_ENABLED', 'true').lower() == 'true' and EVENTS_MAX_CLIENTS > 0
+EVENTS_BUFFER_SIZE = int(os.getenv('EVENTS_BUFFER_SIZE', '1000'))
+EVENTS_HEARTBEAT_SECONDS = int(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+EVENTS_MAX_STREAM_SECONDS = int(os.getenv('EVENTS_MAX_STREAM_SECONDS', '300'))
+
+# Request deadline budgets. Every MongoDB operation made while handling a
+# request shares one client-side timeout (sent to the server as maxTimeMS), so
+# a slow query fails the request with 503 instead of holding a worker thread
+# until gunicorn kills it. ROUTE_DEADLINES_MS overrides the budget per
+# endpoint ("all_tasks=30000,index=2000"); 0 disables the deadline.
+REQUEST_DEADLINE_MS = int(os.getenv('REQUEST_DEADLINE_MS', '5000'))
+DEFAULT_ROUTE_DEADLINES_MS = {
+    'all_tasks': 30000,
+    'bulk_create_tasks': 30000,
+    'bulk_update_tasks': 30000,
+}
+
+def parse_route_deadlines(value):
+    """Parse "endpoint=ms,endpoint=ms" into a dict"""
+    deadlines = {}
+    for item in value.split(','):
+        endpoint, _, ms = item.partition('=')
+        if endpoint.strip():
+            deadlines[endpoint.strip()] = int(ms)
+    return deadlines
+
+ROUTE_DEADLINES_MS = {**DEFAULT_ROUTE_DEADLINES_MS, **parse_route_deadlines(os.getenv('ROUTE_DEADLINES_MS', ''))}
+
+# Adaptive admission control (per worker process): requests over a concurrency
+# limit that follows observed latency are shed at once with 503. Probes and
+# metrics scrapes are always admitted; full page renders only get part of the limit.
+ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+ADMISSION_INITIAL_LIMIT = int(os.getenv('ADMISSION_INITIAL_LIMIT', '20'))
+ADMISSION_MIN_LIMIT = int(os.getenv('ADMISSION_MIN_LIMIT', '2'))
+ADMISSION_MAX_LIMIT = int(os.getenv('ADMISSION_MAX_LIMIT', '200'))
+ADMISSION_LATENCY_TOLERANCE = float(os.getenv('ADMISSION_LATENCY_TOLERANCE', '2.0'))
+ADMISSION_NOISE_FLOOR_MS = int(os.getenv('ADMISSION_NOISE_FLOOR_MS', '5'))
+ADMISSION_LOW_PRIORITY_SHARE = float(os.getenv('ADMISSION_LOW_PRIORITY_SHARE', '0.75'))
+ADMISSION_PRIORITIES = {
+    'ready': CRITICAL,
+    # Scrapes read no MongoDB data, and overload is when the metrics matter most
+    'metrics': CRITICAL,
+    'index': LOW,
+    'all_tasks': LOW,
+}
+# Never counted against the limit: long-lived streams are capped by
+# EVENTS_MAX_CLIENTS instead and their duration says nothing about database
+# latency; liveness probes and static files do not touch MongoDB at all
+ADMISSION_EXEMPT_ENDPOINTS = {'events', 'health', 'static'}
+
+# Create the indexes in REQUIRED_INDEXES in a background thread at startup
+CREATE_INDEXES_ON_STARTUP = os.getenv('CREATE_INDEXES_ON_STARTUP', 'true').lower() == 'true'
+
 def get_db_connection():
-    """
-    Create and return MongoDB connection.
-    Supports two configuration methods (in priority order):
-    1. Individual variables: MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_HOSTNAME, MONGODB_PORT, MONGODB_DBNAME (recommended)
-    2. MONGODB_URI environment variable (fallback for backward compatibility)
-    """
+    """Create and return MongoDB connection"""
     try:
-        # Method 1: Build connection string from individual variables (new primary method)
-        if MONGODB_USERNAME and MONGODB_PASSWORD and MONGODB_HOSTNAME:
-            connection_string = f"mongodb://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOSTNAME}:{MONGODB_PORT}/{MONGODB_DBNAME}?authSource=admin"
-            logger.info(f"Using individual variables for authenticated connection to {MONGODB_HOSTNAME}:{MONGODB_PORT}")
-        # Method 2: Use MONGODB_URI if provided and no individual variables (backward compatibility)
-        elif MONGODB_URI:
-            connection_string = MONGODB_URI
-            logger.info("Using MONGODB_URI for connection (backward compatibility)")
-        # Method 3: Non-authenticated connection using hostname only (local development)
-        elif MONGODB_HOSTNAME:
-            connection_string = f"mongodb://{MONGODB_HOSTNAME}:{MONGODB_PORT}/{MONGODB_DBNAME}"
-            logger.info(f"Using non-authenticated connection to {MONGODB_HOSTNAME}:{MONGODB_PORT}")
-        else:
-            raise Exception("No MongoDB connection configuration found. Please set either individual variables (MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_HOSTNAME) or MONGODB_URI")
-        
-        client = MongoClient(connection_string, serverSelectionTimeoutMS=5000)
+        connection_string = get_connection_string()
+        client = MongoClient(connection_string,
+                             serverSelectionTimeoutMS=5000,
+                             event_listeners=[pool_telemetry, command_metrics],
+                             **get_client_options())
         # Test connection
         client.admin.command('ping')
         logger.info(f"Successfully connected to MongoDB")
@@ -84,45 +179,674 @@ def get_db_connection():
         logger.error(f"Unexpected error connecting to MongoDB: {e}")
         raise
 
-# Initialize database connection
-try:
-    db = get_db_connection()
-    tasks_collection = db.tasks
-except Exception as e:
-    logger.error(f"Failed to initialize database: {e}")
-    db = None
-    tasks_collection = None
+# Connection pool telemetry and command latency metrics for this process's MongoClient
+pool_telemetry = PoolTelemetry()
+command_metrics = CommandMetrics()
+
+# Database connection state (per process)
+# MongoClient is not fork-safe, so nothing connects at import time: every
+# process (gunicorn worker, CLI command) opens its own client on first use.
+# This keeps `gunicorn --preload` safe, and a worker that cannot reach MongoDB
+# keeps retrying in the background instead of staying disconnected until the
+# pod restarts. Until it connects, db and the collections stay None and the
+# routes answer 503.
+db = None
+tasks_collection = None
+stats_collection = None
+task_mirror = None
+event_hub = None
+write_behind = None
+purge = None
+_db_pid = None
+_db_lock = threading.Lock()
+
+def connect_db():
+    """Connect this process to MongoDB and bind the collection globals"""
+    global db, tasks_collection, stats_collection
+    database = get_db_connection()
+    db = database
+    stats_collection = database.task_stats
+    # Routes take tasks_collection as the sign that the database is usable, so it goes last
+    tasks_collection = database.tasks
+
+# Index provisioning
+# Every index the queries in this module rely on is declared here, per
+# collection. Add new entries when a new query shape is introduced.
+REQUIRED_INDEXES = {
+    'tasks': [
+        # index() keyset pagination: sort and range on (created_at, _id)
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='created_at_desc_id_desc'),
+        # delete_all_tasks() purge: completed tasks walked in _id batches
+        IndexModel([('completed', ASCENDING), ('_id', ASCENDING)],
+                   name='completed_id'),
+    ],
+}
+
+def ensure_indexes():
+    """Create every index in REQUIRED_INDEXES; existing indexes are left untouched"""
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        names = db[collection_name].create_indexes(indexes)
+        logger.info(f"Indexes ensured on {collection_name}: {', '.join(names)}")
+
+def missing_indexes():
+    """Return the 'collection.index' names from REQUIRED_INDEXES that do not exist"""
+    missing = []
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        existing = db[collection_name].index_information()
+        missing.extend(f"{collection_name}.{index.document['name']}"
+                       for index in indexes if index.document['name'] not in existing)
+    return missing
+
+# Set once every required index has been seen, so readiness probes stop
+# listing the indexes of the primary on every call
+_indexes_verified = False
+
+def readiness_missing_indexes():
+    """missing_indexes() for /ready, skipped once all indexes have been found"""
+    global _indexes_verified
+    if _indexes_verified:
+        return []
+    missing = missing_indexes()
+    _indexes_verified = not missing
+    return missing
+
+def ensure_indexes_in_background():
+    """Run ensure_indexes() off the request path so startup is not blocked"""
+    def run():
+        try:
+            ensure_indexes()
+        except Exception as e:
+            logger.error(f"Failed to create indexes: {e}")
+
+    thread = threading.Thread(target=run, name='ensure-indexes', daemon=True)
+    thread.start()
+    return thread
+
+@app.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create the required MongoDB indexes and verify they exist."""
+    if db is None:
+        try:
+            connect_db()
+        except Exception:
+            raise SystemExit('Database not available')
+    ensure_indexes()
+    missing = missing_indexes()
+    if missing:
+        raise SystemExit(f"Indexes still missing: {', '.join(missing)}")
+    print("All required indexes exist")
+
+@app.cli.command('verify-indexes')
+def verify_indexes_command():
+    """Exit non-zero if any required MongoDB index is missing."""
+    if db is None:
+        try:
+            connect_db()
+        except Exception:
+            raise SystemExit('Database not available')
+    missing = missing_indexes()
+    if missing:
+        raise SystemExit(f"Missing indexes: {', '.join(missing)}")
+    print("All required indexes exist")
+
+def get_page_size():
+    """Read the requested page size from ?limit="""
+    return parse_page_size(request.args.get('limit'))
+
+def fetch_task_page(after=None, before=None, page_size=TASKS_PAGE_SIZE):
+    """
+    Fetch one page of tasks, newest first, from the task mirror when it is
+    current and from MongoDB otherwise.
+    Returns (tasks, next_cursor, prev_cursor).
+    """
+    # Fetch one extra document to learn whether another page follows
+    if mirror_ready():
+        tasks = task_mirror.page(after, before, page_size + 1)
+    else:
+        query, sort = build_page_query(after, before)
+        tasks = list(tasks_collection.find(query).sort(list(sort.items())).limit(page_size + 1))
+    return finish_page(tasks, after, before, page_size)
+
+# Task statistics
+# The counters shown on the statistics cards live in a single task_stats
+# document that every write route keeps current with atomic $inc updates, so
+# rendering the cards is one _id lookup instead of a count over the tasks.
+# The same document carries a version number that every write bumps; it keys
+# the rendered page cache, so pods only re-render after data has changed.
+def increment_task_stats(total=0, completed=0):
+    """Atomically adjust the task counters and bump the collection version"""
+    # The write being counted has already happened, so the request's deadline
+    # must not cut this short and leave the counters out of step; a fresh
+    # context carries no pymongo.timeout()
+    contextvars.Context().run(_increment_task_stats, total, completed)
+
+def _increment_task_stats(total, completed):
+    result = stats_collection.update_one(
+        {'_id': TASK_STATS_ID},
+        {'$inc': {'total': total, 'completed': completed, 'version': 1}}
+    )
+    # Without a document to adjust, build it from the tasks (which already
+    # include this write) rather than starting the counters from zero
+    if result.matched_count == 0:
+        reconcile_task_stats()
+
+def reconcile_task_stats():
+    """
+    Recompute the task counters from the tasks collection and store them.
+    Writes that land while the recount runs may be missed; run it again once
+    traffic is quiet if exact numbers matter.
+    Returns the updated task_stats document.
+    """
+    counts = next(tasks_collection.aggregate(TASK_COUNTS_PIPELINE), {})
+    return stats_collection.find_one_and_update(
+        {'_id': TASK_STATS_ID},
+        reconciled_stats_update(counts),
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+def reconcile_task_stats_in_background():
+    """Run reconcile_task_stats() in a daemon thread, outside any request deadline"""
+    def run():
+        try:
+            reconcile_task_stats()
+            logger.info("Task statistics reconciled")
+        except Exception as e:
+            logger.error(f"Failed to reconcile task statistics: {e}")
+
+    thread = threading.Thread(target=run, name='reconcile-stats', daemon=True)
+    thread.start()
+    return thread
+
+def get_task_stats():
+    """
+    Return the task_stats document (total, completed and version).
+    The document is built from the tasks collection the first time it is needed.
+    """
+    stats = stats_collection.find_one({'_id': TASK_STATS_ID})
+    if stats is None:
+        logger.info("Task statistics missing, reconciling from tasks collection")
+        return reconcile_task_stats()
+    return stats
+
+@app.cli.command('reconcile-stats')
+def reconcile_stats_command():
+    """Recompute the task_stats counters from the tasks collection."""
+    if tasks_collection is None:
+        try:
+            connect_db()
+        except Exception:
+            raise SystemExit('Database not available')
+    stats = reconcile_task_stats()
+    print(f"Task statistics reconciled: {stats['total']} total, {stats['completed']} completed")
+
+page_cache = PageCache(max_entries=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+compressor = ResponseCompressor(enabled=COMPRESSION_ENABLED,
+                                min_size=COMPRESSION_MIN_SIZE,
+                                gzip_level=COMPRESSION_GZIP_LEVEL,
+                                brotli_quality=COMPRESSION_BROTLI_QUALITY)
+
+limiter = AdaptiveLimiter(initial_limit=ADMISSION_INITIAL_LIMIT,
+                          min_limit=ADMISSION_MIN_LIMIT,
+                          max_limit=ADMISSION_MAX_LIMIT,
+                          tolerance=ADMISSION_LATENCY_TOLERANCE,
+                          noise_floor=ADMISSION_NOISE_FLOOR_MS / 1000,
+                          low_priority_share=ADMISSION_LOW_PRIORITY_SHARE)
+
+# Hashed, immutable, precompressed static files (built by static_assets.py)
+static_assets.init_app(app, compressor)
+
+# Prometheus request metrics and /metrics
+metrics.init_app(app)
+
+def start_background_services(database):
+    """
+    Start the background workers for a new connection and return them as
+    (task_mirror, event_hub, write_behind, purge). If one fails to start, the
+    ones already running are stopped again, so a retry starts from scratch.
+    """
+    tasks = database.tasks
+    started = []
+    mirror = hub = queue = None
+    try:
+        # Task mirror (one per worker process, opt-in)
+        if TASK_MIRROR_ENABLED:
+            mirror = TaskMirror(tasks)
+            mirror.start()
+            started.append(mirror.stop)
+
+        # Live task events for /events (one change stream per worker process)
+        if EVENTS_ENABLED:
+            hub = TaskEventHub(database, TASK_STATS_ID,
+                               max_subscribers=EVENTS_MAX_CLIENTS,
+                               buffer_size=EVENTS_BUFFER_SIZE)
+            hub.start()
+            started.append(hub.stop)
+
+        # Write-behind queue (one per worker process, opt-in)
+        if WRITE_BEHIND_ENABLED:
+            queue = WriteBehindQueue(tasks,
+                                     on_flush=lambda inserted: increment_task_stats(total=inserted),
+                                     max_queue=WRITE_BEHIND_MAX_QUEUE,
+                                     batch_size=WRITE_BEHIND_BATCH_SIZE,
+                                     flush_interval_ms=WRITE_BEHIND_FLUSH_MS,
+                                     enqueue_timeout_ms=WRITE_BEHIND_ENQUEUE_TIMEOUT_MS)
+            queue.start()
+            started.append(queue.close)
+
+        # Completed-task purge; the job document is shared by all pods
+        purge_job = CompletedTaskPurge(tasks, database.purge_jobs, POD_NAME,
+                                       on_deleted=lambda deleted: increment_task_stats(total=-deleted, completed=-deleted),
+                                       batch_size=PURGE_BATCH_SIZE,
+                                       throttle_ms=PURGE_THROTTLE_MS)
+    except Exception:
+        for stop in reversed(started):
+            stop()
+        raise
+    return mirror, hub, queue, purge_job
+
+def connect_and_start():
+    """
+    Connect this process to MongoDB and start its background workers.
+    Everything is built first and published together, tasks_collection
+    last, so a request never sees the connection without the workers; on
+    failure nothing is published and the new client is closed.
+    """
+    global db, tasks_collection, stats_collection, task_mirror, event_hub, write_behind, purge
+    database = get_db_connection()
+    try:
+        services = start_background_services(database)
+    except Exception:
+        database.client.close()
+        raise
+    task_mirror, event_hub, write_behind, purge = services
+    db = database
+    stats_collection = database.task_stats
+    tasks_collection = database.tasks
+    if CREATE_INDEXES_ON_STARTUP:
+        ensure_indexes_in_background()
+
+def reconnect_in_background():
+    """Retry connect_and_start() with jittered exponential backoff until it succeeds"""
+    def run():
+        delay = MONGODB_RECONNECT_MIN_DELAY
+        while True:
+            # Full jitter keeps the workers of every pod from retrying in lockstep
+            time.sleep(random.uniform(0, delay))
+            try:
+                connect_and_start()
+                logger.info(f"Reconnected to MongoDB (pid {os.getpid()})")
+                return
+            except Exception as e:
+                delay = min(delay * 2, MONGODB_RECONNECT_MAX_DELAY)
+                logger.warning(f"MongoDB reconnect failed, retrying in up to {delay:.1f}s: {e}")
+
+    thread = threading.Thread(target=run, name='mongodb-reconnect', daemon=True)
+    thread.start()
+    return thread
+
+def ensure_db():
+    """
+    Connect this process to MongoDB the first time it needs the database.
+    The first attempt is made inline; if it fails, a background thread keeps
+    retrying and requests get 503 until it succeeds.
+    """
+    global _db_pid
+    if _db_pid == os.getpid():
+        return
+    with _db_lock:
+        if _db_pid == os.getpid():
+            return
+        _db_pid = os.getpid()
+        try:
+            connect_and_start()
+        except Exception as e:
+            logger.error(f"Failed to initialize database: {e}")
+            reconnect_in_background()
+
+def reset_db_state():
+    """
+    Forget the parent's client and background workers after a fork.
+    The child opens its own MongoClient on first use; threads do not survive
+    a fork, so the parent's mirror and queues are dead in the child anyway.
+    """
+    global db, tasks_collection, stats_collection, task_mirror, event_hub, write_behind, purge
+    global page_cache, pool_telemetry, command_metrics, _db_pid, _db_lock
+    db = tasks_collection = stats_collection = None
+    task_mirror = event_hub = write_behind = purge = None
+    _db_pid = None
+    # Locks held by other parent threads at fork time would never be released
+    _db_lock = threading.Lock()
+    page_cache = PageCache(max_entries=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+    pool_telemetry = PoolTelemetry()
+    command_metrics = CommandMetrics()
+
+os.register_at_fork(after_in_child=reset_db_state)
+
+@app.before_request
+def admit_request():
+    """Shed the request with 503 when this worker is over its concurrency limit"""
+    if not ADMISSION_CONTROL_ENABLED or request.endpoint in ADMISSION_EXEMPT_ENDPOINTS:
+        return None
+    priority = ADMISSION_PRIORITIES.get(request.endpoint, NORMAL)
+    if not limiter.try_acquire(priority):
+        return busy_response('Server overloaded')
+    g.admission = (time.monotonic(), priority)
+    return None
+
+@app.after_request
+def time_admitted_request(response):
+    """Take the latency sample once the response is ready"""
+    # A streamed body (/all) is sent after this, at the client's pace; its
+    # download time says nothing about MongoDB and must not shrink the limit
+    admission = g.get('admission')
+    if admission is not None:
+        g.admission_latency = time.monotonic() - admission[0]
+    return response
+
+@app.teardown_request
+def release_admission(exc):
+    # The slot is held until the body is sent: a streaming response still occupies a thread
+    admission = g.pop('admission', None)
+    if admission is not None:
+        started, priority = admission
+        latency = g.pop('admission_latency', None)
+        if latency is None:
+            # Unhandled error: no response went through after_request
+            latency = time.monotonic() - started
+        # Probes are cheap and admitted regardless, so they do not feed the latency baseline
+        limiter.release(latency, sample=priority != CRITICAL)
+
+def request_budget_ms():
+    """Deadline budget of the current request's route in ms (0: no deadline)"""
+    return ROUTE_DEADLINES_MS.get(request.endpoint, REQUEST_DEADLINE_MS)
+
+@app.before_request
+def start_request_deadline():
+    """Bound all MongoDB work for this request by its route's deadline budget"""
+    budget_ms = request_budget_ms()
+    if budget_ms > 0:
+        # pymongo.timeout() applies to every operation in this context: it
+        # sets maxTimeMS from the time remaining and fails fast once it is spent
+        g.deadline = pymongo.timeout(budget_ms / 1000)
+        g.deadline.__enter__()
+
+def leave_request_deadline():
+    """Stop applying the request deadline to MongoDB operations made from here on"""
+    deadline = g.pop('deadline', None)
+    if deadline is not None:
+        deadline.__exit__(None, None, None)
+
+@app.teardown_request
+def end_request_deadline(exc):
+    leave_request_deadline()
+
+def deadline_exceeded(error):
+    """True when a MongoDB operation failed because the request ran out of time"""
+    return isinstance(error, PyMongoError) and error.timeout
+
+def deadline_exceeded_response():
+    """503 for a request whose deadline budget ran out"""
+    logger.warning(f"Request deadline exceeded: {request.method} {request.path}")
+    return busy_response('Request deadline exceeded')
+
+def busy_response(reason):
+    """503 asking the client to retry shortly (JSON for API clients, the error page otherwise)"""
+    if request.path.startswith('/api/') or request.accept_mimetypes.best == 'application/json':
+        response = jsonify({'error': reason})
+    else:
+        response = make_response(render_template('error.html',
+                                                 error='The server is busy, please try again',
+                                                 pod_name=POD_NAME))
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+@app.before_request
+def connect_before_request():
+    """Open this process's database connection on its first request"""
+    ensure_db()
+
+@app.after_request
+def compress_response(response):
+    """Compress text responses when the client accepts gzip or brotli"""
+    # Pages the route already encoded (index() serves cached compressed bytes) pass through;
+    # 204 has no body and a 206 range refers to the uncompressed bytes
+    if ('Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300 or response.status_code in (204, 206)
+            or not compressor.should_compress(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = compressor.negotiate(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # /all: compress the stream as it is generated rather than buffering it
+        response.response = compressor.compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if not compressor.should_compress(response.mimetype, len(body)):
+            return response
+        response.set_data(compressor.compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # The compressed body is a different representation and needs its own
+        # tag. The view (send_file for unhashed static files) evaluated the
+        # request's conditions against the old tag, so evaluate them again, or a
+        # client revalidating with the tag it was given would never get a 304.
+        response.set_etag(f'{etag}-{encoding}', weak)
+        response.make_conditional(request)
+    compressor.count_response()
+    return response
+
+def mirror_ready():
+    """True when reads can be served from the task mirror"""
+    return task_mirror is not None and task_mirror.ready
+
+def current_task_stats():
+    """Return total, completed and version from the task mirror or the task_stats document"""
+    if mirror_ready():
+        total_tasks, completed_tasks, version = task_mirror.stats()
+        # Mirror versions count from 0 in every worker process, so they are
+        # only meaningful together with the mirror's id; the pair keeps two
+        # workers (or a recycled one) from tagging different data alike
+        return {'total': total_tasks, 'completed': completed_tasks,
+                'version': f"mirror-{task_mirror.mirror_id}-{version}"}
+    return get_task_stats()
+
+def page_etag(cache_key):
+    """
+    Strong ETag for a rendered task list page.
+    The page embeds the serving pod's name and IP, so the pod is part of the
+    tag; a revalidation that lands on another pod gets a fresh 200.
+    """
+    raw = '|'.join(str(part) for part in (POD_NAME, POD_IP) + cache_key)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+def html_response(body, etag, encoding=None):
+    """Wrap a rendered (possibly compressed) page with its ETag; browsers revalidate on every load"""
+    response = make_response(body)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+        compressor.count_response()
+    return response
+
+def page_variant(page, encoding):
+    """
+    Body and content encoding of a cached page, compressing it at most once per encoding.
+    page maps encodings to bytes; 'identity' holds the uncompressed HTML, which is
+    also what pages smaller than COMPRESSION_MIN_SIZE are served as.
+    """
+    if encoding is None or not compressor.should_compress('text/html', len(page['identity'])):
+        return page['identity'], None
+    body = page.get(encoding)
+    if body is None:
+        body = page[encoding] = compressor.compress(page['identity'], encoding)
+    return body, encoding
 
 @app.route('/')
 def index():
-    """Main page - display all tasks"""
+    """Main page - display one page of tasks"""
     try:
         if tasks_collection is None:
             return render_template('error.html', 
                                  error='Database not available',
                                  pod_name=POD_NAME), 503
         
-        # Get all tasks sorted by creation date (newest first)
-        tasks = list(tasks_collection.find({}).sort('created_at', -1))
+        # Statistics come from the task mirror or the maintained counters document
+        stats = current_task_stats()
         
-        # Count statistics
-        total_tasks = len(tasks)
-        completed_tasks = sum(1 for task in tasks if task.get('completed', False))
+        # Serve the rendered page from cache while the collection version is unchanged
+        cache_key = (stats.get('version', 0), request.args.get('after'),
+                     request.args.get('before'), request.args.get('limit'))
+        # Each content encoding is a separate representation with its own ETag
+        encoding = compressor.negotiate(request.headers.get('Accept-Encoding'))
+        etag = page_etag(cache_key + (encoding or 'identity',))
+        
+        # The client's copy is current: skip the page query and the render entirely
+        if request.if_none_match.contains(etag):
+            response = html_response('', etag)
+            response.status_code = 304
+            return response
+        
+        # Cached pages keep their compressed bytes, so a hit is served without recompressing
+        page = page_cache.get(cache_key)
+        if page is not None:
+            body, body_encoding = page_variant(page, encoding)
+            return html_response(body, etag, body_encoding)
+        
+        # Resolve the page cursor; an unknown or malformed token falls back to the first page
+        after = decode_cursor(request.args['after']) if request.args.get('after') else None
+        before = decode_cursor(request.args['before']) if request.args.get('before') else None
+        page_size = get_page_size()
+        
+        # Get one page of tasks sorted by creation date (newest first)
+        tasks, next_cursor, prev_cursor = fetch_task_page(after, before, page_size)
+        
+        total_tasks = stats.get('total', 0)
+        completed_tasks = stats.get('completed', 0)
         pending_tasks = total_tasks - completed_tasks
         
-        return render_template('index.html',
+        html = render_template('index.html',
                              tasks=tasks,
                              total_tasks=total_tasks,
                              completed_tasks=completed_tasks,
                              pending_tasks=pending_tasks,
+                             next_cursor=next_cursor,
+                             prev_cursor=prev_cursor,
+                             page_size=page_size,
+                             live_updates=EVENTS_ENABLED,
+                             pod_name=POD_NAME,
+                             pod_ip=POD_IP)
+        page = {'identity': html.encode()}
+        body, body_encoding = page_variant(page, encoding)
+        page_cache.set(cache_key, page)
+        return html_response(body, etag, body_encoding)
+    except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
+        logger.error(f"Error loading tasks: {e}")
+        return render_template('error.html',
+                             error='Unable to load tasks',
+                             pod_name=POD_NAME), 500
+
+@app.route('/all')
+def all_tasks():
+    """Display every task, streaming the HTML while the cursor is read"""
+    try:
+        if tasks_collection is None:
+            return render_template('error.html',
+                                 error='Database not available',
+                                 pod_name=POD_NAME), 503
+        
+        stats = current_task_stats()
+        total_tasks = stats.get('total', 0)
+        completed_tasks = stats.get('completed', 0)
+        
+        # The template consumes the cursor lazily, one batch at a time, so the
+        # first bytes go out immediately and memory stays flat however many tasks exist
+        tasks = (tasks_collection.find({})
+                 .sort([('created_at', -1), ('_id', -1)])
+                 .batch_size(TASKS_STREAM_BATCH_SIZE))
+        
+        # The batches are read while the body streams, for as long as the
+        # client takes to download it, and a deadline running out then would
+        # cut the page short after its 200. Leave the request deadline here
+        # and bound the cursor by maxTimeMS instead, which counts only the
+        # server's work on the batches, not the time spent waiting on the client
+        budget_ms = request_budget_ms()
+        leave_request_deadline()
+        if budget_ms > 0:
+            tasks = tasks.max_time_ms(budget_ms)
+        
+        return stream_template('index.html',
+                             tasks=tasks,
+                             total_tasks=total_tasks,
+                             completed_tasks=completed_tasks,
+                             pending_tasks=total_tasks - completed_tasks,
+                             next_cursor=None,
+                             prev_cursor=None,
+                             live_updates=EVENTS_ENABLED,
                              pod_name=POD_NAME,
                              pod_ip=POD_IP)
     except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
         logger.error(f"Error loading tasks: {e}")
         return render_template('error.html',
                              error='Unable to load tasks',
                              pod_name=POD_NAME), 500
 
+@app.route('/events')
+def events():
+    """Live task changes as Server-Sent Events, read from this worker's shared change stream"""
+    hub = event_hub
+    if hub is None or not hub.ready:
+        return busy_response('Live updates unavailable')
+    if not hub.subscribe():
+        return busy_response('Too many live update clients')
+    # A browser reconnecting on its own sends Last-Event-ID; live.js passes it as a parameter
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    after, newest_id, resumed = hub.position(last_event_id)
+
+    def stream():
+        # EventSource reconnects after this many ms, sending the last id it saw
+        yield f"retry: {random.randint(1000, 5000)}\n\n"
+        if not resumed:
+            yield "event: reset\ndata: {}\n\n"
+        elif newest_id and newest_id != last_event_id:
+            # An id without data sets the browser's resume point without an event
+            yield f"id: {newest_id}\n\n"
+        position = after
+        # Ending the stream now and then spreads clients over new pods and workers
+        ends_at = time.monotonic() + EVENTS_MAX_STREAM_SECONDS
+        while time.monotonic() < ends_at and hub.ready:
+            events, missed = hub.wait(position, EVENTS_HEARTBEAT_SECONDS)
+            if missed:
+                position, _, _ = hub.position()
+                yield "event: reset\ndata: {}\n\n"
+            elif not events:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+            for position, event_id, name, data in events:
+                id_line = f"id: {event_id}\n" if event_id else ''
+                yield f"{id_line}event: {name}\ndata: {data}\n\n"
+
+    response = Response(stream(), mimetype='text/event-stream')
+    # Runs however the stream ends, including a client that disconnects before the first byte
+    response.call_on_close(hub.unsubscribe)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Tell nginx-style proxies not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/create', methods=['POST'])
 def create_task():
     """Create a new task"""
@@ -134,18 +858,27 @@ def create_task():
         if not title:
             return redirect(url_for('index'))
         
-        task = {
-            'title': title,
-            'completed': False,
-            'created_at': datetime.utcnow(),
-            'created_by_pod': POD_NAME
-        }
+        task = new_task(title)
+        
+        if write_behind is not None:
+            # Acknowledge once queued; the flusher inserts it and bumps the counters
+            task['_id'] = ObjectId()
+            try:
+                write_behind.submit(task)
+            except QueueFull:
+                logger.warning(f"Write-behind queue full, rejecting task on pod {POD_NAME}")
+                return jsonify({'error': 'Too many pending writes, retry shortly'}), 503, {'Retry-After': '1'}
+            logger.info(f"Task queued: {task['_id']} by pod {POD_NAME}")
+            return redirect(url_for('index'))
         
         result = tasks_collection.insert_one(task)
+        increment_task_stats(total=1)
         logger.info(f"Task created: {result.inserted_id} by pod {POD_NAME}")
         
         return redirect(url_for('index'))
     except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
         logger.error(f"Error creating task: {e}")
         return render_template('error.html',
                              error='Unable to create task',
@@ -158,29 +891,33 @@ def complete_task(task_id):
         if tasks_collection is None:
             return jsonify({'error': 'Database not available'}), 503
         
-        # Get current task
-        task = tasks_collection.find_one({'_id': ObjectId(task_id)})
-        if not task:
-            return redirect(url_for('index'))
-        
-        # Toggle completed status
-        new_status = not task.get('completed', False)
-        
-        tasks_collection.update_one(
+        # Toggle completed status atomically in one round trip; the pipeline
+        # update reads the stored value, so concurrent toggles from other pods
+        # cannot be lost, and the updated document tells us the new state
+        task = tasks_collection.find_one_and_update(
             {'_id': ObjectId(task_id)},
-            {
+            [{
                 '$set': {
-                    'completed': new_status,
+                    'completed': {'$not': ['$completed']},
                     'updated_at': datetime.utcnow(),
-                    'updated_by_pod': POD_NAME
+                    'updated_by_pod': {'$literal': POD_NAME}
                 }
-            }
+            }],
+            projection={'completed': True},
+            return_document=ReturnDocument.AFTER
         )
+        if not task:
+            return redirect(url_for('index'))
+        
+        new_status = task['completed']
+        increment_task_stats(completed=1 if new_status else -1)
         
         logger.info(f"Task {task_id} marked as {'completed' if new_status else 'pending'} by pod {POD_NAME}")
         
         return redirect(url_for('index'))
     except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
         logger.error(f"Error updating task {task_id}: {e}")
         return render_template('error.html',
                              error='Unable to update task',
@@ -193,13 +930,18 @@ def delete_task(task_id):
         if tasks_collection is None:
             return jsonify({'error': 'Database not available'}), 503
         
-        result = tasks_collection.delete_one({'_id': ObjectId(task_id)})
+        # find_one_and_delete returns the removed task so the counters know its status
+        task = tasks_collection.find_one_and_delete({'_id': ObjectId(task_id)},
+                                                    projection={'completed': True})
         
-        if result.deleted_count > 0:
+        if task is not None:
+            increment_task_stats(total=-1, completed=-1 if task.get('completed', False) else 0)
             logger.info(f"Task {task_id} deleted by pod {POD_NAME}")
         
         return redirect(url_for('index'))
     except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
         logger.error(f"Error deleting task {task_id}: {e}")
         return render_template('error.html',
                              error='Unable to delete task',
@@ -207,21 +949,241 @@ def delete_task(task_id):
 
 @app.route('/delete-all', methods=['POST'])
 def delete_all_tasks():
-    """Delete all completed tasks"""
+    """Delete all completed tasks in a background purge job"""
     try:
         if tasks_collection is None:
             return jsonify({'error': 'Database not available'}), 503
         
-        result = tasks_collection.delete_many({'completed': True})
-        logger.info(f"All completed tasks deleted ({result.deleted_count} tasks) by pod {POD_NAME}")
+        # The purge runs in bounded batches off the request thread; if one is
+        # already running (on any pod) this reports it instead of starting another
+        job, started = purge.start()
+        if started:
+            logger.info(f"Purge of completed tasks started by pod {POD_NAME}")
+        else:
+            logger.info(f"Purge of completed tasks already running on pod {job.get('pod')}")
         
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(purge_status_json(job)), 202
         return redirect(url_for('index'))
     except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
         logger.error(f"Error deleting completed tasks: {e}")
         return render_template('error.html',
                              error='Unable to delete tasks',
                              pod_name=POD_NAME), 500
 
+@app.route('/delete-all/status')
+def delete_all_status():
+    """Progress of the completed-task purge"""
+    try:
+        if purge is None:
+            return jsonify({'error': 'Database not available'}), 503
+        job = purge.status()
+        if job is None:
+            return jsonify({'status': 'idle', 'deleted': 0}), 200
+        return jsonify(purge_status_json(job)), 200
+    except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
+        logger.error(f"Error reading purge status: {e}")
+        return jsonify({'error': 'Unable to read purge status'}), 500
+
+def parse_bulk_items():
+    """
+    Read the bulk request body as a JSON array or NDJSON (one task per line).
+    Returns a list of parsed items; an NDJSON line that is not valid JSON is
+    kept as an Exception so it can be reported against its index.
+    Raises ValueError when the body is not a JSON array or NDJSON.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(e)
+        return items
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('tasks')
+    if not isinstance(payload, list):
+        raise ValueError('Expected a JSON array of tasks or an NDJSON body')
+    return payload
+
+@app.route('/api/tasks/bulk', methods=['POST'])
+def bulk_create_tasks():
+    """Create many tasks with unordered insert_many batches"""
+    try:
+        if tasks_collection is None:
+            return jsonify({'error': 'Database not available'}), 503
+        
+        try:
+            items = parse_bulk_items()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not items:
+            return jsonify({'error': 'No tasks given'}), 400
+        if len(items) > BULK_MAX_TASKS:
+            return jsonify({'error': f'At most {BULK_MAX_TASKS} tasks per request'}), 413
+        
+        # Validate every item up front; only valid ones are sent to MongoDB
+        results = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            title = item.get('title') if isinstance(item, dict) else None
+            if isinstance(item, Exception):
+                results[index] = {'index': index, 'status': 'invalid', 'error': f'Invalid JSON: {item}'}
+            elif not isinstance(title, str) or not title.strip():
+                results[index] = {'index': index, 'status': 'invalid', 'error': 'title is required'}
+            else:
+                pending.append((index, new_task(title.strip())))
+        
+        created = unknown = 0
+        for start in range(0, len(pending), BULK_INSERT_BATCH_SIZE):
+            batch = pending[start:start + BULK_INSERT_BATCH_SIZE]
+            failed = {}
+            outcome_unknown = None
+            try:
+                tasks_collection.insert_many([task for _, task in batch], ordered=False)
+            except BulkWriteError as e:
+                # Unordered: every document without a write error was inserted
+                failed = {error['index']: error['errmsg'] for error in e.details.get('writeErrors', [])}
+            except PyMongoError as e:
+                # Outcome unknown for the whole batch (e.g. connection lost
+                # mid-write): some documents may have been inserted
+                outcome_unknown = str(e)
+            
+            for position, (index, task) in enumerate(batch):
+                if outcome_unknown is not None:
+                    # insert_many assigns the _id before sending, so a client
+                    # can look the task up instead of retrying into a duplicate
+                    results[index] = {'index': index, 'status': 'unknown', 'error': outcome_unknown}
+                    if '_id' in task:
+                        results[index]['id'] = str(task['_id'])
+                    unknown += 1
+                elif position in failed:
+                    results[index] = {'index': index, 'status': 'failed', 'error': failed[position]}
+                else:
+                    results[index] = {'index': index, 'status': 'created', 'id': str(task['_id'])}
+                    created += 1
+        
+        if created:
+            increment_task_stats(total=created)
+        if unknown:
+            # The counters cannot be adjusted for writes that may or may not
+            # have happened; recount them from the tasks instead
+            reconcile_task_stats_in_background()
+        logger.info(f"Bulk created {created} of {len(items)} tasks by pod {POD_NAME}"
+                    + (f", {unknown} with unknown outcome" if unknown else ""))
+        
+        return jsonify({
+            'created': created,
+            'failed': len(items) - created - unknown,
+            'unknown': unknown,
+            'results': results,
+            'pod': POD_NAME
+        }), 201 if created == len(items) else 207
+    except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
+        logger.error(f"Error bulk creating tasks: {e}")
+        return jsonify({'error': 'Unable to create tasks'}), 500
+
+def parse_task_ids():
+    """
+    Read a list of task IDs from a JSON array or {"ids": [...]} body.
+    Returns (ids, invalid): de-duplicated ObjectIds in request order and the
+    raw values that are not valid ObjectIds.
+    Raises ValueError when the body is not a list of IDs.
+    """
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('ids')
+    if not isinstance(payload, list):
+        raise ValueError('Expected a JSON array of task IDs or {"ids": [...]}')
+
+    ids, invalid, seen = [], [], set()
+    for value in payload:
+        if isinstance(value, str) and ObjectId.is_valid(value):
+            task_id = ObjectId(value)
+            if task_id not in seen:
+                seen.add(task_id)
+                ids.append(task_id)
+        else:
+            invalid.append(value)
+    return ids, invalid
+
+@app.route('/api/tasks/bulk/<action>', methods=['POST'])
+def bulk_update_tasks(action):
+    """Complete, uncomplete or delete a list of tasks with a single bulk_write"""
+    try:
+        if tasks_collection is None:
+            return jsonify({'error': 'Database not available'}), 503
+        if action not in ('complete', 'uncomplete', 'delete'):
+            return jsonify({'error': f'Unknown action: {action}'}), 404
+        
+        # Reject the whole request before touching the database if any ID is malformed
+        try:
+            ids, invalid = parse_task_ids()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if invalid:
+            return jsonify({'error': 'Invalid task IDs', 'invalid_ids': invalid}), 400
+        if not ids:
+            return jsonify({'error': 'No task IDs given'}), 400
+        if len(ids) > BULK_MAX_TASKS:
+            return jsonify({'error': f'At most {BULK_MAX_TASKS} tasks per request'}), 413
+        
+        if action == 'delete':
+            # Deleting the completed and the pending tasks separately tells
+            # exactly how many of each went, so the counters stay right
+            # without a separate (racy) count first
+            deleted_completed = tasks_collection.delete_many(
+                {'_id': {'$in': ids}, 'completed': True}).deleted_count
+            deleted_pending = tasks_collection.delete_many(
+                {'_id': {'$in': ids}, 'completed': {'$ne': True}}).deleted_count
+            deleted = deleted_completed + deleted_pending
+            if deleted:
+                increment_task_stats(total=-deleted, completed=-deleted_completed)
+            summary = {'deleted': deleted}
+        else:
+            # Every existing task matches; the pipeline keeps a task already in
+            # the target state exactly as it is, so it is matched but not
+            # modified, and modified counts are the change in completed tasks
+            completed = action == 'complete'
+            unchanged = {'$eq': [{'$ifNull': ['$completed', False]}, completed]}
+            update = [{
+                '$set': {
+                    'completed': {'$cond': [unchanged, '$completed', completed]},
+                    'updated_at': {'$cond': [unchanged, '$updated_at', datetime.utcnow()]},
+                    'updated_by_pod': {'$cond': [unchanged, '$updated_by_pod', {'$literal': POD_NAME}]}
+                }
+            }]
+            result = tasks_collection.bulk_write(
+                [UpdateOne({'_id': task_id}, update) for task_id in ids], ordered=False)
+            if result.modified_count:
+                increment_task_stats(completed=result.modified_count if completed
+                                     else -result.modified_count)
+            summary = {'matched': result.matched_count, 'modified': result.modified_count}
+        
+        logger.info(f"Bulk {action} of {len(ids)} tasks by pod {POD_NAME}: {summary}")
+        
+        return jsonify({
+            'action': action,
+            'requested': len(ids),
+            **summary,
+            'pod': POD_NAME
+        }), 200
+    except Exception as e:
+        if deadline_exceeded(e):
+            return deadline_exceeded_response()
+        logger.error(f"Error applying bulk {action}: {e}")
+        return jsonify({'error': f'Unable to {action} tasks'}), 500
+
 @app.route('/health')
 def health():
     """Health check endpoint for Kubernetes liveness probe"""
@@ -231,18 +1193,33 @@ def health():
         'timestamp': datetime.utcnow().isoformat()
     }), 200
 
+def gevent_patch_status():
+    """Which of the modules MongoDB I/O depends on gevent has patched in this process"""
+    from gevent import monkey
+    return {name: monkey.is_module_patched(name) for name in GEVENT_PATCHED_MODULES}
+
 @app.route('/ready')
 def ready():
     """Readiness check endpoint for Kubernetes readiness probe"""
     try:
+        # In gevent mode an unpatched module would block the whole worker on MongoDB I/O
+        patched = gevent_patch_status() if GEVENT_ENABLED else None
+        if patched is not None and not all(patched.values()):
+            unpatched = [name for name, ok in patched.items() if not ok]
+            raise Exception(f"gevent monkey-patching incomplete: {', '.join(unpatched)} not patched")
         if db is None:
             raise Exception("Database not initialized")
         # Test database connection
         db.command('ping')
+        # Missing indexes are reported but do not fail readiness
+        missing = readiness_missing_indexes()
         return jsonify({
             'status': 'ready',
             'pod': POD_NAME,
             'database': 'connected',
+            'indexes': 'missing' if missing else 'present',
+            'missing_indexes': missing,
+            'gevent_patched': patched,
             'timestamp': datetime.utcnow().isoformat()
         }), 200
     except Exception as e:
@@ -255,6 +1232,72 @@ def ready():
             'timestamp': datetime.utcnow().isoformat()
         }), 503
 
+@app.route('/cache-stats')
+def cache_stats():
+    """Rendered page cache counters for this worker process"""
+    return jsonify({
+        'pod': POD_NAME,
+        'pid': os.getpid(),
+        'page_cache': page_cache.stats(),
+        'compression': compressor.stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@app.route('/pool-stats')
+def pool_stats():
+    """MongoDB connection pool telemetry for this worker process"""
+    return jsonify({
+        'pod': POD_NAME,
+        'pid': os.getpid(),
+        'options': {name: int(value) for name, value in MONGODB_POOL_OPTIONS.items() if value},
+        'pool': pool_telemetry.stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@app.route('/mirror-stats')
+def mirror_stats():
+    """Task mirror state and replication lag for this worker process"""
+    return jsonify({
+        'pod': POD_NAME,
+        'pid': os.getpid(),
+        'enabled': task_mirror is not None,
+        'task_mirror': task_mirror.metrics() if task_mirror is not None else None,
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@app.route('/events-stats')
+def events_stats():
+    """Live update subscribers and change stream state for this worker process"""
+    return jsonify({
+        'pod': POD_NAME,
+        'pid': os.getpid(),
+        'enabled': event_hub is not None,
+        'events': event_hub.metrics() if event_hub is not None else None,
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@app.route('/write-behind-stats')
+def write_behind_stats():
+    """Write-behind queue depth and flush latency for this worker process"""
+    return jsonify({
+        'pod': POD_NAME,
+        'pid': os.getpid(),
+        'enabled': write_behind is not None,
+        'write_behind': write_behind.metrics() if write_behind is not None else None,
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@app.route('/admission-stats')
+def admission_stats():
+    """Admission control limit, in-flight requests and shed counts for this worker process"""
+    return jsonify({
+        'pod': POD_NAME,
+        'pid': os.getpid(),
+        'enabled': ADMISSION_CONTROL_ENABLED,
+        'admission': limiter.stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -0,0 +1,353 @@
+"""
+Task Manager Application - asyncio edition
+The same routes, templates and configuration as app.py, served by Quart on an
+ASGI server with the Motor asyncio MongoDB driver. A worker keeps every
+in-flight request waiting on MongoDB on one event loop instead of tying up a
+thread per request, so concurrency is no longer capped at workers x threads.
+
+Run with gunicorn managing uvicorn workers (gunicorn sets TCP_NODELAY on the
+listening socket; uvicorn's own --workers mode does not, which adds a ~40ms
+Nagle/delayed-ACK stall to every keep-alive response):
+    gunicorn -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:5000 --workers 2 app_async:app
+"""
+import asyncio
+import os
+import random
+import logging
+from datetime import datetime
+from quart import Quart, render_template, stream_template, request, redirect, url_for, jsonify
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, ReturnDocument
+from bson.objectid import ObjectId
+
+# Configuration and the database-independent helpers are shared with the sync
+# app through tasks_common, which (unlike app.py) has no import-time side effects
+from tasks_common import (
+    get_secret_key, POD_NAME, POD_IP, MONGODB_DBNAME, TASK_STATS_ID, TASK_COUNTS_PIPELINE,
+    TASKS_STREAM_BATCH_SIZE, PURGE_BATCH_SIZE, PURGE_THROTTLE_MS,
+    MONGODB_RECONNECT_MIN_DELAY, MONGODB_RECONNECT_MAX_DELAY,
+    get_connection_string, get_client_options, decode_cursor, parse_page_size,
+    build_page_query, finish_page, new_task, reconciled_stats_update, purge_status_json
+)
+from purge import CompletedTaskPurge
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+app = Quart(__name__)
+app.config.update(
+    SECRET_KEY=get_secret_key(),
+    SESSION_COOKIE_SAMESITE='Lax',
+    SESSION_COOKIE_HTTPONLY=True
+)
+
+# Database connection state (per worker process, created on its event loop)
+client = None
+db = None
+tasks_collection = None
+stats_collection = None
+purge = None
+
+async def connect_db():
+    """Connect this worker to MongoDB and bind the collection globals"""
+    global client, db, tasks_collection, stats_collection, purge
+    motor_client = AsyncIOMotorClient(get_connection_string(),
+                                      serverSelectionTimeoutMS=5000,
+                                      **get_client_options())
+    await motor_client.admin.command('ping')
+    client = motor_client
+    tasks_collection = client[MONGODB_DBNAME].tasks
+    stats_collection = client[MONGODB_DBNAME].task_stats
+    db = client[MONGODB_DBNAME]
+
+    # The purge job runs batches in its own thread, so it keeps a small
+    # synchronous client instead of sharing the event loop
+    purge_db = MongoClient(get_connection_string(), serverSelectionTimeoutMS=5000, maxPoolSize=2)[MONGODB_DBNAME]
+    purge = CompletedTaskPurge(purge_db.tasks, purge_db.purge_jobs, POD_NAME,
+                               on_deleted=lambda deleted: purge_db.task_stats.update_one(
+                                   {'_id': TASK_STATS_ID},
+                                   {'$inc': {'total': -deleted, 'completed': -deleted, 'version': 1}}),
+                               batch_size=PURGE_BATCH_SIZE,
+                               throttle_ms=PURGE_THROTTLE_MS)
+    logger.info(f"Successfully connected to MongoDB (asyncio, pid {os.getpid()})")
+
+async def reconnect():
+    """Retry connect_db() with jittered exponential backoff until it succeeds"""
+    delay = MONGODB_RECONNECT_MIN_DELAY
+    while db is None:
+        await asyncio.sleep(random.uniform(0, delay))
+        try:
+            await connect_db()
+        except Exception as e:
+            delay = min(delay * 2, MONGODB_RECONNECT_MAX_DELAY)
+            logger.warning(f"MongoDB reconnect failed, retrying in up to {delay:.1f}s: {e}")
+
+@app.before_serving
+async def startup():
+    """Connect once the worker's event loop is running"""
+    try:
+        await connect_db()
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {e}")
+        app.add_background_task(reconnect)
+
+@app.after_serving
+async def shutdown():
+    if client is not None:
+        client.close()
+
+# Task statistics (see app.py)
+async def reconcile_task_stats():
+    """Recompute the task counters from the tasks collection and store them"""
+    counts = await tasks_collection.aggregate(TASK_COUNTS_PIPELINE).to_list(length=1)
+    return await stats_collection.find_one_and_update(
+        {'_id': TASK_STATS_ID},
+        reconciled_stats_update(counts[0] if counts else {}),
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+async def increment_task_stats(total=0, completed=0):
+    """Atomically adjust the task counters and bump the collection version"""
+    result = await stats_collection.update_one(
+        {'_id': TASK_STATS_ID},
+        {'$inc': {'total': total, 'completed': completed, 'version': 1}}
+    )
+    if result.matched_count == 0:
+        await reconcile_task_stats()
+
+async def get_task_stats():
+    """Return the task_stats document, building it on first use"""
+    stats = await stats_collection.find_one({'_id': TASK_STATS_ID})
+    if stats is None:
+        logger.info("Task statistics missing, reconciling from tasks collection")
+        return await reconcile_task_stats()
+    return stats
+
+@app.route('/')
+async def index():
+    """Main page - display one page of tasks"""
+    try:
+        if tasks_collection is None:
+            return await render_template('error.html',
+                                         error='Database not available',
+                                         pod_name=POD_NAME), 503
+
+        stats = await get_task_stats()
+
+        # Resolve the page cursor; an unknown or malformed token falls back to the first page
+        after = decode_cursor(request.args['after']) if request.args.get('after') else None
+        before = decode_cursor(request.args['before']) if request.args.get('before') else None
+        page_size = parse_page_size(request.args.get('limit'))
+
+        # Fetch one extra document to learn whether another page follows
+        query, sort = build_page_query(after, before)
+        tasks = await tasks_collection.find(query).sort(list(sort.items())).to_list(length=page_size + 1)
+        tasks, next_cursor, prev_cursor = finish_page(tasks, after, before, page_size)
+
+        total_tasks = stats.get('total', 0)
+        completed_tasks = stats.get('completed', 0)
+
+        return await render_template('index.html',
+                                     tasks=tasks,
+                                     total_tasks=total_tasks,
+                                     completed_tasks=completed_tasks,
+                                     pending_tasks=total_tasks - completed_tasks,
+                                     next_cursor=next_cursor,
+                                     prev_cursor=prev_cursor,
+                                     page_size=page_size,
+                                     pod_name=POD_NAME,
+                                     pod_ip=POD_IP)
+    except Exception as e:
+        logger.error(f"Error loading tasks: {e}")
+        return await render_template('error.html',
+                                     error='Unable to load tasks',
+                                     pod_name=POD_NAME), 500
+
+@app.route('/all')
+async def all_tasks():
+    """Display every task, streaming the HTML while the cursor is read"""
+    try:
+        if tasks_collection is None:
+            return await render_template('error.html',
+                                         error='Database not available',
+                                         pod_name=POD_NAME), 503
+
+        stats = await get_task_stats()
+        total_tasks = stats.get('total', 0)
+        completed_tasks = stats.get('completed', 0)
+
+        # Quart renders templates asynchronously, so the template iterates the Motor cursor directly
+        tasks = (tasks_collection.find({})
+                 .sort([('created_at', -1), ('_id', -1)])
+                 .batch_size(TASKS_STREAM_BATCH_SIZE))
+
+        return await stream_template('index.html',
+                                     tasks=tasks,
+                                     total_tasks=total_tasks,
+                                     completed_tasks=completed_tasks,
+                                     pending_tasks=total_tasks - completed_tasks,
+                                     next_cursor=None,
+                                     prev_cursor=None,
+                                     pod_name=POD_NAME,
+                                     pod_ip=POD_IP)
+    except Exception as e:
+        logger.error(f"Error loading tasks: {e}")
+        return await render_template('error.html',
+                                     error='Unable to load tasks',
+                                     pod_name=POD_NAME), 500
+
+@app.route('/create', methods=['POST'])
+async def create_task():
+    """Create a new task"""
+    try:
+        if tasks_collection is None:
+            return jsonify({'error': 'Database not available'}), 503
+
+        title = (await request.form).get('title', '').strip()
+        if not title:
+            return redirect(url_for('index'))
+
+        result = await tasks_collection.insert_one(new_task(title))
+        await increment_task_stats(total=1)
+        logger.info(f"Task created: {result.inserted_id} by pod {POD_NAME}")
+
+        return redirect(url_for('index'))
+    except Exception as e:
+        logger.error(f"Error creating task: {e}")
+        return await render_template('error.html',
+                                     error='Unable to create task',
+                                     pod_name=POD_NAME), 500
+
+@app.route('/complete/<task_id>', methods=['POST'])
+async def complete_task(task_id):
+    """Toggle task completion status"""
+    try:
+        if tasks_collection is None:
+            return jsonify({'error': 'Database not available'}), 503
+
+        # Toggle completed status atomically in one round trip (see app.py)
+        task = await tasks_collection.find_one_and_update(
+            {'_id': ObjectId(task_id)},
+            [{
+                '$set': {
+                    'completed': {'$not': ['$completed']},
+                    'updated_at': datetime.utcnow(),
+                    'updated_by_pod': {'$literal': POD_NAME}
+                }
+            }],
+            projection={'completed': True},
+            return_document=ReturnDocument.AFTER
+        )
+        if not task:
+            return redirect(url_for('index'))
+
+        new_status = task['completed']
+        await increment_task_stats(completed=1 if new_status else -1)
+
+        logger.info(f"Task {task_id} marked as {'completed' if new_status else 'pending'} by pod {POD_NAME}")
+
+        return redirect(url_for('index'))
+    except Exception as e:
+        logger.error(f"Error updating task {task_id}: {e}")
+        return await render_template('error.html',
+                                     error='Unable to update task',
+                                     pod_name=POD_NAME), 500
+
+@app.route('/delete/<task_id>', methods=['POST'])
+async def delete_task(task_id):
+    """Delete a task"""
+    try:
+        if tasks_collection is None:
+            return jsonify({'error': 'Database not available'}), 503
+
+        task = await tasks_collection.find_one_and_delete({'_id': ObjectId(task_id)},
+                                                          projection={'completed': True})
+
+        if task is not None:
+            await increment_task_stats(total=-1, completed=-1 if task.get('completed', False) else 0)
+            logger.info(f"Task {task_id} deleted by pod {POD_NAME}")
+
+        return redirect(url_for('index'))
+    except Exception as e:
+        logger.error(f"Error deleting task {task_id}: {e}")
+        return await render_template('error.html',
+                                     error='Unable to delete task',
+                                     pod_name=POD_NAME), 500
+
+@app.route('/delete-all', methods=['POST'])
+async def delete_all_tasks():
+    """Delete all completed tasks in a background purge job"""
+    try:
+        if tasks_collection is None:
+            return jsonify({'error': 'Database not available'}), 503
+
+        # Claiming the job is a blocking pymongo call; keep it off the event loop
+        job, started = await asyncio.to_thread(purge.start)
+        if started:
+            logger.info(f"Purge of completed tasks started by pod {POD_NAME}")
+
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(purge_status_json(job)), 202
+        return redirect(url_for('index'))
+    except Exception as e:
+        logger.error(f"Error deleting completed tasks: {e}")
+        return await render_template('error.html',
+                                     error='Unable to delete tasks',
+                                     pod_name=POD_NAME), 500
+
+@app.route('/health')
+async def health():
+    """Health check endpoint for Kubernetes liveness probe"""
+    return jsonify({
+        'status': 'healthy',
+        'pod': POD_NAME,
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@app.route('/ready')
+async def ready():
+    """Readiness check endpoint for Kubernetes readiness probe"""
+    try:
+        if db is None:
+            raise Exception("Database not initialized")
+        await db.command('ping')
+        return jsonify({
+            'status': 'ready',
+            'pod': POD_NAME,
+            'database': 'connected',
+            'timestamp': datetime.utcnow().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        return jsonify({
+            'status': 'not ready',
+            'pod': POD_NAME,
+            'database': 'disconnected',
+            'error': str(e),
+            'timestamp': datetime.utcnow().isoformat()
+        }), 503
+
+@app.errorhandler(404)
+async def not_found(error):
+    """Handle 404 errors"""
+    return await render_template('error.html',
+                                 error='Page not found',
+                                 pod_name=POD_NAME), 404
+
+@app.errorhandler(500)
+async def internal_error(error):
+    """Handle 500 errors"""
+    logger.error(f"Internal server error: {error}")
+    return await render_template('error.html',
+                                 error='Internal server error',
+                                 pod_name=POD_NAME), 500
+
+if __name__ == '__main__':
+    # For development only - use gunicorn with uvicorn workers in production
+    port = int(os.getenv('PORT', '5000'))
+    app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,145 @@
+"""
+HTTP response compression.
+Picks brotli or gzip from the request's Accept-Encoding and compresses text
+responses above a minimum size. Callers that cache rendered pages keep the
+compressed bytes, so serving a cached page costs no compression CPU.
+Streamed responses are compressed incrementally, flushed every few KB so the
+browser still starts rendering before the stream ends.
+"""
+import gzip
+import threading
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'image/svg+xml'
+}
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    codings = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+class ResponseCompressor:
+    """Negotiates and applies gzip/brotli, with per-process byte and CPU counters"""
+
+    def __init__(self, enabled=True, min_size=1024, gzip_level=6, brotli_quality=4,
+                 stream_flush_bytes=16384):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stream_flush_bytes = stream_flush_bytes
+        # Preferred first: brotli is smaller than gzip at comparable CPU cost
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_ms = 0.0
+        self._lock = threading.Lock()
+
+    def negotiate(self, accept_encoding):
+        """Return the best encoding the client accepts, or None for identity"""
+        if not self.enabled:
+            return None
+        codings = parse_accept_encoding(accept_encoding)
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = codings.get(encoding, codings.get('*', 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def should_compress(self, mimetype, size=None):
+        """Whether a response of this type (and size, when known) is worth compressing"""
+        return (self.enabled and mimetype in COMPRESSIBLE_MIMETYPES
+                and (size is None or size >= self.min_size))
+
+    def compress(self, body, encoding):
+        """Compress a complete body with the given encoding"""
+        start = time.process_time()
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            # mtime=0 keeps the output (and so the ETag's meaning) deterministic
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        self._record(len(body), len(compressed), start)
+        return compressed
+
+    def compress_stream(self, chunks, encoding):
+        """Compress an iterable of chunks, flushing once enough input has accumulated"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            process, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            process, finish = compressor.compress, compressor.flush
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        pending = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            start = time.process_time()
+            output = process(chunk)
+            pending += len(chunk)
+            if pending >= self.stream_flush_bytes:
+                output += flush()
+                pending = 0
+            self._record(len(chunk), len(output), start)
+            if output:
+                yield output
+        start = time.process_time()
+        output = finish()
+        self._record(0, len(output), start)
+        yield output
+
+    def _record(self, bytes_in, bytes_out, start):
+        elapsed_ms = (time.process_time() - start) * 1000
+        with self._lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_ms += elapsed_ms
+
+    def count_response(self):
+        with self._lock:
+            self.responses += 1
+
+    def stats(self):
+        """Return the compression counters as a dict"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'encodings': list(self.encodings),
+                'min_size': self.min_size,
+                'gzip_level': self.gzip_level,
+                'brotli_quality': self.brotli_quality if brotli is not None else None,
+                'responses': self.responses,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else None,
+                'cpu_ms': round(self.cpu_ms, 1)
+            }
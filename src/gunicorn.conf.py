@@ -0,0 +1,174 @@
+"""
+Gunicorn configuration for the Task Manager app.
+Worker and thread counts are derived from the container's cgroup CPU quota and
+memory limit, so the same image fits whatever limits Kubernetes assigns. Every
+value can be overridden with a GUNICORN_* environment variable.
+"""
+import os
+
+# gevent workers: patch the standard library before preload_app imports the
+# app (and with it pymongo), otherwise MongoDB sockets block the whole worker
+if os.getenv('GUNICORN_WORKER_CLASS') == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+import gc
+import math
+import shutil
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# Prometheus multiprocess mode: every worker writes its metric samples to files
+# here and /metrics merges them. Must be set before the app (and with it
+# prometheus_client) is preloaded.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-metrics')
+
+
+def read_cgroup_file(*paths):
+    """Return the stripped contents of the first readable cgroup file, or None"""
+    for path in paths:
+        try:
+            with open(os.path.join(CGROUP_ROOT, path)) as f:
+                return f.read().strip()
+        except OSError:
+            continue
+    return None
+
+
+def cpu_limit():
+    """CPUs available to the container: the cgroup quota, else the CPUs we may run on"""
+    available = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = read_cgroup_file('cpu.max')
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max':
+            return min(available, int(quota) / int(period))
+        return available
+
+    # cgroup v1: quota is -1 when unlimited
+    quota = read_cgroup_file('cpu/cpu.cfs_quota_us', 'cpu,cpuacct/cpu.cfs_quota_us')
+    period = read_cgroup_file('cpu/cpu.cfs_period_us', 'cpu,cpuacct/cpu.cfs_period_us')
+    if quota and period and int(quota) > 0:
+        return min(available, int(quota) / int(period))
+    return available
+
+
+def memory_limit():
+    """Container memory limit in bytes, or None when unlimited"""
+    limit = read_cgroup_file('memory.max', 'memory/memory.limit_in_bytes')
+    if not limit or limit == 'max':
+        return None
+    # cgroup v1 reports "unlimited" as a page-rounded huge number
+    limit = int(limit)
+    return limit if limit < 1 << 60 else None
+
+
+cpus = cpu_limit()
+memory = memory_limit()
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class not in ('sync', 'gthread', 'gevent'):
+    raise ValueError(f"GUNICORN_WORKER_CLASS must be sync, gthread or gevent, not {worker_class!r}")
+
+# A sync worker blocks on every MongoDB call, so it needs more processes per CPU;
+# gthread and gevent workers overlap I/O inside one process and need about one per CPU.
+if worker_class == 'sync':
+    default_workers = 2 * math.ceil(cpus) + 1
+else:
+    default_workers = max(2, math.ceil(cpus))
+
+# Never start more workers than the memory limit can hold
+worker_memory = int(os.getenv('GUNICORN_WORKER_MEMORY_MB', '128')) * 1024 * 1024
+if memory is not None:
+    default_workers = max(1, min(default_workers, memory // worker_memory))
+
+workers = int(os.getenv('GUNICORN_WORKERS', str(default_workers)))
+
+# gthread request threads mostly wait on MongoDB, so give every CPU a few of
+# them, spread over the workers. Each extra thread also costs memory (stack,
+# buffers, a pooled MongoDB connection); the worker budget covers the first two,
+# the rest must fit in what the memory limit leaves after the workers.
+if worker_class == 'gthread':
+    default_threads = max(2, math.ceil(int(os.getenv('GUNICORN_THREADS_PER_CPU', '4')) * cpus / workers))
+    if memory is not None:
+        thread_memory = int(os.getenv('GUNICORN_THREAD_MEMORY_MB', '8')) * 1024 * 1024
+        spare_threads = (memory // workers - worker_memory) // thread_memory + 2
+        default_threads = max(2, min(default_threads, spare_threads))
+    threads = int(os.getenv('GUNICORN_THREADS', str(default_threads)))
+else:
+    threads = 1
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Each open /events stream (live updates) holds its connection for minutes.
+# A gevent worker parks it on a greenlet, so allow half the connections; in
+# sync and gthread workers it would hold a whole thread, so live updates are
+# off unless EVENTS_MAX_CLIENTS is set explicitly.
+if worker_class == 'gevent':
+    os.environ.setdefault('EVENTS_MAX_CLIENTS', str(worker_connections // 2))
+else:
+    os.environ.setdefault('EVENTS_MAX_CLIENTS', '0')
+
+# Admission control in the app caps concurrent requests per worker; by default
+# it may grow to what the worker can actually run at once. A gthread worker runs
+# `threads` requests; a gevent worker runs up to worker_connections greenlets,
+# less those set aside for /events streams (which admission control skips),
+# and starts at a fifth of that.
+if worker_class == 'gthread':
+    os.environ.setdefault('ADMISSION_INITIAL_LIMIT', str(threads))
+    os.environ.setdefault('ADMISSION_MAX_LIMIT', str(threads))
+elif worker_class == 'gevent':
+    admission_max_limit = max(1, worker_connections - int(os.environ['EVENTS_MAX_CLIENTS']))
+    os.environ.setdefault('ADMISSION_INITIAL_LIMIT', str(max(1, admission_max_limit // 5)))
+    os.environ.setdefault('ADMISSION_MAX_LIMIT', str(admission_max_limit))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Recycle workers periodically; the jitter keeps them from all restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', str(max_requests // 10)))
+
+# Import the app once in the master; MongoDB clients are created per worker after the fork
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Start from an empty metrics directory; files left by a previous run would be merged in"""
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """Freeze the preloaded heap before workers are forked"""
+    # Objects moved to the permanent generation are never scanned by the
+    # collector again, so it does not write to their pages and forked workers
+    # keep sharing them copy-on-write.
+    gc.collect()
+    gc.freeze()
+    memory_mb = f"{memory // (1024 * 1024)}MB" if memory is not None else 'unlimited'
+    server.log.info(f"CPU limit {cpus:g}, memory limit {memory_mb}: "
+                    f"{workers} {worker_class} workers x {threads} threads, "
+                    f"max_requests {max_requests}+{max_requests_jitter}, {gc.get_freeze_count()} objects frozen")
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metric files into the pod totals"""
+    # Without this every recycled worker (max_requests) leaves its files
+    # behind, and each scrape reads all of them
+    from metrics import archive_dead_worker
+    archive_dead_worker(worker.pid)
+
+
+def post_worker_init(worker):
+    """Connect the new worker to MongoDB before it accepts requests"""
+    # Each worker opens its own MongoClient after the fork (see ensure_db);
+    # doing it here keeps the first request from paying for the connection.
+    from app import ensure_db
+    ensure_db()
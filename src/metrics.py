@@ -0,0 +1,109 @@
+"""
+Prometheus metrics.
+Request counts and latency per Flask endpoint, recorded by request hooks and
+exported at /metrics together with the MongoDB command metrics from
+mongo_monitoring. Under gunicorn every worker writes its samples to files in
+PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) and /metrics merges the
+files of all workers, so a scrape sees the totals of the whole pod whichever
+worker answers it, and counts survive worker restarts: when a worker exits,
+gunicorn.conf.py folds its files into per-type archive files.
+"""
+import fcntl
+import glob
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter,
+                               Histogram, generate_latest, multiprocess)
+from prometheus_client.mmap_dict import MmapedDict
+
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUESTS = Counter('http_requests_total',
+                   'HTTP requests by Flask endpoint, method and status code',
+                   ['endpoint', 'method', 'status'])
+REQUEST_LATENCY = Histogram('http_request_duration_seconds',
+                            'Time until the response is ready to send, by Flask endpoint',
+                            ['endpoint', 'method'],
+                            buckets=REQUEST_LATENCY_BUCKETS)
+
+
+# Metric types whose samples are summed across workers, so an exited worker's
+# values can be added to the archive file of its type
+ARCHIVED_TYPES = ('counter', 'histogram', 'summary')
+# Not a .db file, so the collector does not try to read it
+ARCHIVE_LOCK_FILE = 'archive.lock'
+
+
+@contextmanager
+def archive_lock(directory, exclusive=False):
+    """
+    Shared by scrapes, exclusive while a worker's files are archived.
+    Moving samples touches two files; without the lock a scrape could count
+    them twice or miss them, and Prometheus would read the dip as a counter reset.
+    """
+    with open(os.path.join(directory, ARCHIVE_LOCK_FILE), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def archive_dead_worker(pid):
+    """Add an exited worker's samples to the archive files and delete its files"""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not directory:
+        return
+    with archive_lock(directory, exclusive=True):
+        multiprocess.mark_process_dead(pid, directory)
+        for path in glob.glob(os.path.join(directory, f'*_{pid}.db')):
+            typ = os.path.basename(path).split('_')[0]
+            if typ not in ARCHIVED_TYPES:
+                continue
+            archive = MmapedDict(os.path.join(directory, f'{typ}_archive.db'))
+            try:
+                for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(path):
+                    total, _ = archive.read_value(key)
+                    archive.write_value(key, total + value, timestamp)
+            finally:
+                archive.close()
+            os.remove(path)
+
+
+def registry():
+    """The registry to export: all workers' files in multiprocess mode, else this process"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        merged = CollectorRegistry()
+        multiprocess.MultiProcessCollector(merged)
+        return merged
+    return REGISTRY
+
+
+def init_app(app):
+    """Time every request and serve the metrics at /metrics"""
+
+    # Registered before the app's own hooks, so shed and failed requests are timed too
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            # Unmatched URLs share one label so scanners cannot create new series
+            endpoint = request.endpoint or 'unmatched'
+            REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+            REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus text exposition of the request and MongoDB metrics"""
+        directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+        if directory:
+            with archive_lock(directory):
+                body = generate_latest(registry())
+        else:
+            body = generate_latest(registry())
+        return Response(body, content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,149 @@
+"""
+MongoDB driver telemetry.
+Listeners registered on the MongoClient (event_listeners=[...]): pool
+counters kept per process and exported by the app as JSON, and command
+latency recorded as Prometheus histograms (exported at /metrics).
+"""
+import threading
+import time
+
+from prometheus_client import Counter, Histogram
+from pymongo import monitoring
+
+COMMAND_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+COMMAND_LATENCY = Histogram('mongodb_command_duration_seconds',
+                            'MongoDB command round trip time, by command name and collection',
+                            ['command', 'collection'],
+                            buckets=COMMAND_LATENCY_BUCKETS)
+COMMAND_FAILURES = Counter('mongodb_command_failures_total',
+                           'MongoDB commands that returned an error, by command name and collection',
+                           ['command', 'collection'])
+
+
+def command_collection(event):
+    """The collection a command targets, or '' for database and server commands"""
+    if event.command_name == 'getMore':
+        target = event.command.get('collection')
+    else:
+        target = event.command.get(event.command_name)
+    return target if isinstance(target, str) else ''
+
+
+class PoolTelemetry(monitoring.ConnectionPoolListener):
+    """Connection pool size, churn and checkout wait time for one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkout_started = threading.local()
+        self.pools = 0
+        self.clears = 0
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.close_reasons = {}
+
+    # Pool lifecycle
+    def pool_created(self, event):
+        with self._lock:
+            self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.clears += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.pools -= 1
+
+    # Connection lifecycle (churn)
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+            self.close_reasons[event.reason] = self.close_reasons.get(event.reason, 0) + 1
+
+    # Checkouts (wait time is measured on the requesting thread)
+    def connection_check_out_started(self, event):
+        self._checkout_started.value = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._record_wait()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        wait_ms = self._record_wait()
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            if wait_ms is not None:
+                self.wait_total_ms += wait_ms
+                self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def _record_wait(self):
+        started = getattr(self._checkout_started, 'value', None)
+        self._checkout_started.value = None
+        if started is None:
+            return None
+        return (time.perf_counter() - started) * 1000
+
+    def stats(self):
+        """Return the pool counters as a dict"""
+        with self._lock:
+            return {
+                'pools': self.pools,
+                'pool_clears': self.clears,
+                'connections_open': self.created - self.closed,
+                'connections_in_use': self.checked_out,
+                'connections_created': self.created,
+                'connections_closed': self.closed,
+                'close_reasons': dict(self.close_reasons),
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'checkout_wait_avg_ms': self.wait_total_ms / self.checkouts if self.checkouts else None,
+                'checkout_wait_max_ms': self.wait_max_ms
+            }
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Command latency histograms by command name and collection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Only started events carry the command document; keep its collection until it finishes
+        self._collections = {}
+
+    def started(self, event):
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = command_collection(event)
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        collection = self._record(event)
+        COMMAND_FAILURES.labels(event.command_name, collection).inc()
+
+    def _record(self, event):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), '')
+        COMMAND_LATENCY.labels(event.command_name, collection).observe(event.duration_micros / 1e6)
+        return collection
@@ -0,0 +1,124 @@
+"""
+Background purge of completed tasks.
+Completed tasks are deleted in bounded batches walked in _id order, with a
+pause between batches so the primary is not saturated. Progress lives in a
+job document in MongoDB, so any pod can report status, only one purge runs
+at a time across the deployment, and a purge whose pod died is resumed from
+its last _id by the next pod that starts one.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+PURGE_JOB_ID = 'delete-completed-tasks'
+
+
+class CompletedTaskPurge:
+    """Runs the completed-task purge as a resumable background job"""
+
+    def __init__(self, tasks_collection, jobs_collection, pod_name, on_deleted=None,
+                 batch_size=1000, throttle_ms=100, stale_after=60):
+        self.tasks_collection = tasks_collection
+        self.jobs_collection = jobs_collection
+        self.pod_name = pod_name
+        self.on_deleted = on_deleted
+        self.batch_size = batch_size
+        self.throttle = throttle_ms / 1000
+        self.stale_after = stale_after
+
+    def status(self):
+        """Return the purge job document, or None if no purge has ever run"""
+        return self.jobs_collection.find_one({'_id': PURGE_JOB_ID})
+
+    def start(self):
+        """
+        Start a purge in a background thread unless one is already running.
+        Returns (job, started): the current job document and whether this call
+        started (or resumed) it.
+        """
+        now = datetime.utcnow()
+        try:
+            # Claim the job if it is idle, or if its heartbeat shows the pod running it died
+            previous = self.jobs_collection.find_one_and_update(
+                {'_id': PURGE_JOB_ID, '$or': [
+                    {'status': {'$ne': 'running'}},
+                    {'heartbeat_at': {'$lt': now - timedelta(seconds=self.stale_after)}}
+                ]},
+                {'$set': {'status': 'running', 'pod': self.pod_name, 'heartbeat_at': now}},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            # The job document exists and did not match: a live purge is running elsewhere
+            return self.status(), False
+
+        if previous is not None and previous.get('status') == 'running':
+            logger.info(f"Resuming purge abandoned by pod {previous.get('pod')} "
+                        f"after {previous.get('deleted', 0)} tasks")
+        else:
+            self.jobs_collection.update_one(
+                {'_id': PURGE_JOB_ID},
+                {'$set': {'deleted': 0, 'batches': 0, 'last_id': None,
+                          'started_at': now, 'finished_at': None, 'error': None}}
+            )
+
+        thread = threading.Thread(target=self._run, name='purge-completed', daemon=True)
+        thread.start()
+        return self.status(), True
+
+    def _run(self):
+        try:
+            job = self.status()
+            last_id = job.get('last_id')
+            while True:
+                deleted, last_id = self._delete_batch(last_id)
+                if last_id is None:
+                    break
+                self.jobs_collection.update_one(
+                    {'_id': PURGE_JOB_ID},
+                    {
+                        '$set': {'last_id': last_id, 'heartbeat_at': datetime.utcnow()},
+                        '$inc': {'deleted': deleted, 'batches': 1}
+                    }
+                )
+                time.sleep(self.throttle)
+
+            job = self.jobs_collection.find_one_and_update(
+                {'_id': PURGE_JOB_ID},
+                {'$set': {'status': 'completed', 'finished_at': datetime.utcnow()}},
+                return_document=ReturnDocument.AFTER
+            )
+            logger.info(f"Purge of completed tasks finished ({job.get('deleted', 0)} tasks) by pod {self.pod_name}")
+        except Exception as e:
+            logger.error(f"Purge of completed tasks failed: {e}")
+            self.jobs_collection.update_one(
+                {'_id': PURGE_JOB_ID},
+                {'$set': {'status': 'failed', 'error': str(e), 'finished_at': datetime.utcnow()}}
+            )
+
+    def _delete_batch(self, last_id):
+        """
+        Delete the next batch of completed tasks after last_id.
+        Returns (deleted_count, new_last_id); new_last_id is None when done.
+        """
+        query = {'completed': True}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        ids = [task['_id'] for task in self.tasks_collection
+               .find(query, projection={'_id': True})
+               .sort('_id', 1)
+               .limit(self.batch_size)]
+        if not ids:
+            return 0, None
+
+        # Re-check completed: a task toggled back since the read is kept
+        result = self.tasks_collection.delete_many({'_id': {'$in': ids}, 'completed': True})
+        if result.deleted_count and self.on_deleted is not None:
+            self.on_deleted(result.deleted_count)
+        return result.deleted_count, ids[-1]
@@ -0,0 +1,107 @@
+// Live updates: apply task changes pushed over /events (Server-Sent Events)
+// to the page in place instead of reloading it.
+(function () {
+    var script = document.currentScript;
+    var list = document.getElementById('task-list');
+    var template = document.getElementById('task-template');
+    if (!window.EventSource || !script || !list || !template) {
+        return;
+    }
+    var eventsUrl = script.dataset.eventsUrl;
+    var lastEventId = null;
+    var retryDelay = 1000;
+
+    function findTask(id) {
+        return list.querySelector('[data-task-id="' + id + '"]');
+    }
+
+    function fill(item, task) {
+        item.classList.toggle('completed', task.completed);
+        item.querySelector('.task-checkbox').checked = task.completed;
+        item.querySelector('.task-title').textContent = task.title;
+    }
+
+    function taskCreated(task) {
+        // Only the newest page shows new tasks; older pages keep their slice
+        if (list.dataset.newestPage !== 'true' || findTask(task.id)) {
+            return;
+        }
+        var item = template.content.firstElementChild.cloneNode(true);
+        item.dataset.taskId = task.id;
+        item.querySelectorAll('form').forEach(function (form) {
+            form.action = form.getAttribute('action').replace('TASK_ID', task.id);
+        });
+        fill(item, task);
+        item.querySelector('.task-created').textContent =
+            task.created_at ? task.created_at.slice(0, 16).replace('T', ' ') : '';
+        if (task.created_by_pod) {
+            item.querySelector('.task-pod strong').textContent = task.created_by_pod;
+        } else {
+            item.querySelector('.task-pod').remove();
+        }
+        var empty = document.getElementById('empty-state');
+        if (empty) {
+            empty.remove();
+        }
+        list.prepend(item);
+    }
+
+    function taskUpdated(task) {
+        var item = findTask(task.id);
+        if (item) {
+            fill(item, task);
+        }
+    }
+
+    function taskDeleted(task) {
+        var item = findTask(task.id);
+        if (item) {
+            item.remove();
+        }
+    }
+
+    function stats(counts) {
+        document.getElementById('stat-total').textContent = counts.total;
+        document.getElementById('stat-pending').textContent = counts.pending;
+        document.getElementById('stat-completed').textContent = counts.completed;
+    }
+
+    var handlers = {
+        'task-created': taskCreated,
+        'task-updated': taskUpdated,
+        'task-deleted': taskDeleted,
+        'stats': stats
+    };
+
+    function connect() {
+        var url = lastEventId ? eventsUrl + '?last_event_id=' + encodeURIComponent(lastEventId) : eventsUrl;
+        var source = new EventSource(url);
+        Object.keys(handlers).forEach(function (name) {
+            source.addEventListener(name, function (event) {
+                if (event.lastEventId) {
+                    lastEventId = event.lastEventId;
+                }
+                handlers[name](JSON.parse(event.data));
+            });
+        });
+        // Changes were missed (buffer overrun, stream history lost): start over
+        source.addEventListener('reset', function () {
+            source.close();
+            window.location.reload();
+        });
+        source.addEventListener('open', function () {
+            retryDelay = 1000;
+        });
+        source.addEventListener('error', function () {
+            // The browser retries dropped streams itself, but gives up after
+            // an error status (503 while the server is busy or the change
+            // stream is down); retry those with backoff
+            if (source.readyState === EventSource.CLOSED) {
+                setTimeout(connect, retryDelay * (0.5 + Math.random()));
+                retryDelay = Math.min(retryDelay * 2, 60000);
+            }
+        });
+    }
+
+    connect();
+})();
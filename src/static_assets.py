@@ -0,0 +1,122 @@
+"""
+Content-fingerprinted static assets.
+At build time (python static_assets.py, run by the Dockerfile) every file
+under static/ is copied to static/dist/ with a hash of its content in the
+name, alongside precompressed .gz and .br siblings, and a manifest maps the
+original names to the hashed ones. At runtime url_for('static', ...) emits
+the hashed URL, and hashed files are served as immutable for a year with
+the precompressed body matching the client's Accept-Encoding, so each
+browser fetches a given version once and Python never compresses it.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+
+from flask import request, send_from_directory
+
+from compression import COMPRESSIBLE_MIMETYPES, brotli
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_MAX_AGE = 31536000
+HASH_LENGTH = 12
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.html', '.txt', '.json', '.map'}
+
+
+def build(static_folder):
+    """Write hashed copies, .gz/.br siblings and the manifest into static/dist/"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                content = f.read()
+
+            stem, ext = os.path.splitext(relative)
+            digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+            hashed = f'{stem}.{digest}{ext}'
+            target = os.path.join(dist, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+
+            # Build time can afford the slowest, smallest settings
+            if ext in COMPRESSIBLE_EXTENSIONS:
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + '.br', 'wb') as f:
+                        f.write(brotli.compress(content, quality=11))
+            manifest[relative] = f'{DIST_DIR}/{hashed}'
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    """Original filename -> hashed path, or {} when the assets were not built"""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.info("Static asset manifest not found, serving unversioned static URLs "
+                    "(run python static_assets.py to build it)")
+        return {}
+
+
+def init_app(app, compressor):
+    """Emit hashed static URLs and serve hashed files as immutable, precompressed"""
+    manifest = load_manifest(app.static_folder)
+    hashed_files = set(manifest.values())
+    serve_unhashed = app.view_functions['static']
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        """url_for('static', filename='style.css') -> /static/dist/style.<hash>.css"""
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    def static(filename):
+        if filename not in hashed_files:
+            return serve_unhashed(filename=filename)
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        if mimetype in COMPRESSIBLE_MIMETYPES:
+            encoding = compressor.negotiate(request.headers.get('Accept-Encoding'))
+        suffix = {'br': '.br', 'gzip': '.gz'}.get(encoding, '')
+        if suffix and not os.path.exists(os.path.join(app.static_folder, filename + suffix)):
+            encoding, suffix = None, ''
+
+        response = send_from_directory(app.static_folder, filename + suffix,
+                                       mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        # The URL changes whenever the content does, so the browser never needs to revalidate
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        if mimetype in COMPRESSIBLE_MIMETYPES:
+            response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    app.view_functions['static'] = static
+    return manifest
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    for original, hashed in sorted(build(folder).items()):
+        logger.info(f"{original} -> {hashed}")
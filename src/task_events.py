@@ -0,0 +1,206 @@
+"""
+Live task events for Server-Sent Events clients.
+One change stream per worker process follows the tasks and task_stats
+collections and turns each change into a small event (task created, updated
+or deleted, new statistics). Events go into a shared ring buffer and every
+/events connection in the process reads from it, so a thousand browsers cost
+one change stream, not a thousand cursors.
+
+Event ids are the change stream resume tokens, which are the same on every
+pod, so a browser that reconnects to another worker or pod with
+Last-Event-ID is replayed what it missed while it is still in the buffer, and
+told to reload otherwise.
+"""
+import json
+import logging
+import random
+import threading
+from collections import deque
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from task_mirror import RESUME_FAILED_CODES, StreamEnded
+
+logger = logging.getLogger(__name__)
+
+
+def task_event_data(task):
+    """The JSON fields a browser needs to draw or update one task"""
+    created_at = task.get('created_at')
+    return {
+        'id': str(task['_id']),
+        'title': task.get('title', ''),
+        'completed': task.get('completed', False),
+        'created_at': created_at.isoformat() if created_at is not None else None,
+        'created_by_pod': task.get('created_by_pod')
+    }
+
+
+class TaskEventHub:
+    """Shared change stream reader fanning task events out to SSE subscribers"""
+
+    def __init__(self, database, stats_id, max_subscribers=100, buffer_size=1000,
+                 retry_delay=1, max_retry_delay=30):
+        self.database = database
+        self.stats_id = stats_id
+        self.max_subscribers = max_subscribers
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.resume_token = None
+        self.subscribers = 0
+        self.events_published = 0
+        self.rejected = 0
+        self.last_error = None
+        # (seq, event id, event name, JSON data), oldest first
+        self._events = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._streaming = False
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start following the change stream in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='task-events', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        with self._changed:
+            self._changed.notify_all()
+
+    @property
+    def ready(self):
+        """True while the change stream is open"""
+        return self._streaming and not self._stop.is_set()
+
+    def subscribe(self):
+        """Reserve a subscriber slot; False when the process already has max_subscribers"""
+        with self._changed:
+            if self.subscribers >= self.max_subscribers:
+                self.rejected += 1
+                return False
+            self.subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._changed:
+            self.subscribers -= 1
+
+    def position(self, last_event_id=None):
+        """
+        Where a subscriber starts reading: (seq, event id, resumed). seq is just
+        past last_event_id when it is still buffered, otherwise the newest
+        event, whose id is returned as the client's new resume point. resumed
+        is False when the client asked to resume but the events it missed are gone.
+        """
+        with self._changed:
+            newest_id = None
+            for seq, event_id, _, _ in self._events:
+                if last_event_id and event_id == last_event_id:
+                    return seq, event_id, True
+                newest_id = event_id or newest_id
+            return self._seq, newest_id, not last_event_id
+
+    def wait(self, after, timeout):
+        """
+        Block until there are events newer than `after` or `timeout` passes.
+        Returns (events, missed): missed is True when the subscriber fell so
+        far behind that some of its events left the buffer.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._seq > after or self._stop.is_set(), timeout)
+            if self._seq <= after:
+                return [], False
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            if after + 1 < oldest:
+                return [], True
+            return [event for event in self._events if event[0] > after], False
+
+    def _publish(self, event_id, name, data):
+        with self._changed:
+            self._seq += 1
+            self._events.append((self._seq, event_id, name, json.dumps(data)))
+            self.events_published += 1
+            self._changed.notify_all()
+
+    def _run(self):
+        delay = self.retry_delay
+        while not self._stop.is_set():
+            try:
+                self._follow()
+                delay = self.retry_delay
+            except PyMongoError as e:
+                if isinstance(e, OperationFailure) and e.code in RESUME_FAILED_CODES:
+                    # Events between the token and now are lost; clients must reload
+                    self.resume_token = None
+                    self._publish(None, 'reset', {})
+                self.last_error = str(e)
+                logger.warning(f"Task event change stream failed, retrying: {e}")
+            except Exception as e:
+                # Resuming would replay the event that failed; skip ahead to
+                # now and have clients reload the changes lost in between
+                self.resume_token = None
+                self._publish(None, 'reset', {})
+                self.last_error = repr(e)
+                logger.exception("Task event stream failed, retrying")
+            finally:
+                self._streaming = False
+            # Back off with jitter before reopening the stream
+            self._stop.wait(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def _follow(self):
+        """Open the change stream and publish its events until it fails"""
+        pipeline = [{'$match': {'$or': [{'ns.coll': {'$in': ['tasks', 'task_stats']}},
+                                        {'operationType': {'$in': ['dropDatabase', 'invalidate']}}]}}]
+        with self.database.watch(pipeline,
+                                 full_document='updateLookup',
+                                 resume_after=self.resume_token,
+                                 max_await_time_ms=1000) as stream:
+            self._streaming = True
+            self.last_error = None
+            while stream.alive and not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    self._handle(change)
+                self.resume_token = stream.resume_token
+
+    def _handle(self, change):
+        """Turn one change stream event into a published event"""
+        operation = change['operationType']
+        event_id = change['_id']['_data']
+        if operation in ('drop', 'rename', 'dropDatabase', 'invalidate'):
+            self._publish(event_id, 'reset', {})
+            if operation == 'invalidate':
+                # The stream cannot be resumed; open a new one from now
+                self.resume_token = None
+                raise StreamEnded(f"Change stream ended by {operation} event")
+            return
+
+        document = change.get('fullDocument')
+        if change['ns']['coll'] == 'task_stats':
+            if document is not None and document['_id'] == self.stats_id:
+                total, completed = document.get('total', 0), document.get('completed', 0)
+                self._publish(event_id, 'stats', {'total': total, 'completed': completed,
+                                                  'pending': total - completed})
+        elif operation == 'delete':
+            self._publish(event_id, 'task-deleted', {'id': str(change['documentKey']['_id'])})
+        elif operation == 'insert':
+            self._publish(event_id, 'task-created', task_event_data(document))
+        elif document is not None:
+            self._publish(event_id, 'task-updated', task_event_data(document))
+
+    def metrics(self):
+        """Return the hub state as a dict"""
+        with self._changed:
+            return {
+                'ready': self.ready,
+                'subscribers': self.subscribers,
+                'max_subscribers': self.max_subscribers,
+                'rejected': self.rejected,
+                'events_published': self.events_published,
+                'buffered': len(self._events),
+                'last_error': self.last_error
+            }
@@ -0,0 +1,208 @@
+"""
+In-memory mirror of the tasks collection.
+Each worker process loads the collection once and then follows a MongoDB
+change stream, so index() can serve pages and statistics without a database
+round trip. Change streams need a replica set or sharded cluster; against a
+standalone server the mirror never becomes ready and callers fall back to
+querying MongoDB directly.
+"""
+import bisect
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Sort key for tasks missing created_at, so they sort oldest
+MIN_DATETIME = datetime.min
+
+# Server error codes meaning a resume token can no longer be used
+# (ChangeStreamFatalError, ChangeStreamHistoryLost)
+RESUME_FAILED_CODES = (280, 286)
+
+
+def task_key(task):
+    """Sort key of a task: (created_at, _id), ascending"""
+    return (task.get('created_at') or MIN_DATETIME, task['_id'])
+
+
+class StreamEnded(PyMongoError):
+    """The change stream was invalidated and must be reopened from a new snapshot"""
+
+
+class TaskMirror:
+    """Change-stream-fed replica of a collection, ordered by (created_at, _id)"""
+
+    def __init__(self, collection, retry_delay=1, max_retry_delay=30):
+        self.collection = collection
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.resume_token = None
+        # version counts from 0 in every mirror; the id tells apart the
+        # mirrors of different worker processes (and of recycled workers)
+        self.mirror_id = uuid.uuid4().hex[:16]
+        self.version = 0
+        self.bootstraps = 0
+        self.events_applied = 0
+        self.last_event_at = None
+        self.lag_seconds = None
+        self.last_error = None
+        self._tasks = {}
+        self._keys = []
+        self._completed = 0
+        self._streaming = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start following the collection in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='task-mirror', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def ready(self):
+        """True while the change stream is open and the mirror is current"""
+        return self._streaming and not self._stop.is_set()
+
+    def _run(self):
+        delay = self.retry_delay
+        while not self._stop.is_set():
+            try:
+                self._follow()
+                delay = self.retry_delay
+            except PyMongoError as e:
+                if isinstance(e, OperationFailure) and e.code in RESUME_FAILED_CODES:
+                    # The oplog no longer covers the token; re-bootstrap
+                    self.resume_token = None
+                self.last_error = str(e)
+                logger.warning(f"Task mirror change stream failed, falling back to direct queries: {e}")
+            except Exception as e:
+                # A bug or a document the mirror cannot order; resuming would
+                # replay the same event, so start over from a fresh snapshot
+                self.resume_token = None
+                self.last_error = repr(e)
+                logger.exception("Task mirror failed, falling back to direct queries")
+            finally:
+                self._streaming = False
+            # Back off with jitter before reopening the stream
+            self._stop.wait(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def _follow(self):
+        """Open the change stream, bootstrap if needed, then apply events until it fails"""
+        # Resume where the last stream stopped; without a token, open the stream
+        # before reading the snapshot so no write between the two is lost
+        with self.collection.watch(full_document='updateLookup',
+                                   resume_after=self.resume_token,
+                                   max_await_time_ms=1000) as stream:
+            if self.resume_token is None:
+                self._bootstrap()
+                self.resume_token = stream.resume_token
+            self._streaming = True
+            self.last_error = None
+            while stream.alive and not self._stop.is_set():
+                change = stream.try_next()
+                if change is None:
+                    # Idle stream: the mirror is current as of now
+                    self.lag_seconds = 0.0
+                    self.resume_token = stream.resume_token
+                    continue
+                self._apply(change)
+                self.resume_token = stream.resume_token
+
+    def _bootstrap(self):
+        """Replace the mirror contents with a full read of the collection"""
+        tasks = {task['_id']: task for task in self.collection.find({})}
+        keys = sorted(task_key(task) for task in tasks.values())
+        completed = sum(1 for task in tasks.values() if task.get('completed', False))
+        with self._lock:
+            self._tasks, self._keys, self._completed = tasks, keys, completed
+            self.version += 1
+        self.bootstraps += 1
+        logger.info(f"Task mirror bootstrapped with {len(tasks)} tasks")
+
+    def _apply(self, change):
+        """Apply one change stream event"""
+        operation = change['operationType']
+        if operation in ('drop', 'rename', 'dropDatabase', 'invalidate'):
+            # The stream cannot continue; start over from a fresh snapshot
+            self.resume_token = None
+            raise StreamEnded(f"Change stream ended by {operation} event")
+
+        with self._lock:
+            task_id = change['documentKey']['_id']
+            self._remove(task_id)
+            if operation in ('insert', 'replace', 'update') and change.get('fullDocument'):
+                self._insert(change['fullDocument'])
+            self.version += 1
+
+        self.events_applied += 1
+        self.last_event_at = time.time()
+        wall_time = change.get('wallTime')
+        if wall_time is not None:
+            self.lag_seconds = max(0.0, (datetime.utcnow() - wall_time).total_seconds())
+        elif change.get('clusterTime') is not None:
+            self.lag_seconds = max(0.0, time.time() - change['clusterTime'].time)
+
+    def _remove(self, task_id):
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return
+        key = task_key(task)
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+        if task.get('completed', False):
+            self._completed -= 1
+
+    def _insert(self, task):
+        self._tasks[task['_id']] = task
+        bisect.insort(self._keys, task_key(task))
+        if task.get('completed', False):
+            self._completed += 1
+
+    def stats(self):
+        """Return (total_tasks, completed_tasks, version)"""
+        with self._lock:
+            return len(self._tasks), self._completed, self.version
+
+    def page(self, after=None, before=None, limit=50):
+        """
+        Return up to `limit` tasks in the same order as the keyset query:
+        newest first, or oldest first when paging `before` a cursor.
+        """
+        with self._lock:
+            if before is not None:
+                start = bisect.bisect_right(self._keys, before)
+                keys = self._keys[start:start + limit]
+            else:
+                end = bisect.bisect_left(self._keys, after) if after is not None else len(self._keys)
+                keys = self._keys[max(0, end - limit):end][::-1]
+            return [self._tasks[key[1]] for key in keys]
+
+    def metrics(self):
+        """Return the mirror state as a dict"""
+        total_tasks, completed_tasks, version = self.stats()
+        return {
+            'ready': self.ready,
+            'mirror_id': self.mirror_id,
+            'tasks': total_tasks,
+            'completed': completed_tasks,
+            'version': version,
+            'bootstraps': self.bootstraps,
+            'events_applied': self.events_applied,
+            'replication_lag_seconds': self.lag_seconds,
+            'last_event_at': self.last_event_at,
+            'last_error': self.last_error
+        }
+
@@ -0,0 +1,245 @@
+"""
+Configuration and database-independent helpers shared by app.py (Flask) and
+app_async.py (Quart + Motor).
+Importing this module has no side effects beyond reading environment
+variables: no app, no metrics, no fork hooks and no gevent patching, so each
+edition imports only its own stack.
+"""
+import base64
+import logging
+import os
+from datetime import datetime
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+logger = logging.getLogger(__name__)
+
+
+# Security configuration
+# Use SECRET_KEY from environment, or generate a default for development
+# In production, always set SECRET_KEY environment variable
+def get_secret_key():
+    """SECRET_KEY from the environment, or an insecure default for development"""
+    secret_key = os.getenv('SECRET_KEY')
+    if not secret_key:
+        logger.warning("SECRET_KEY not set, using insecure default for development")
+        secret_key = 'dev-insecure-key-change-in-production'
+    return secret_key
+
+
+# MongoDB Configuration from environment variables
+# Supports two methods (in priority order):
+# 1. Individual variables: MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_HOSTNAME, MONGODB_PORT, MONGODB_DBNAME (recommended)
+# 2. MONGODB_URI: Full connection string (fallback for backward compatibility)
+MONGODB_USERNAME = os.getenv('MONGODB_USERNAME', '')
+MONGODB_PASSWORD = os.getenv('MONGODB_PASSWORD', '')
+MONGODB_HOSTNAME = os.getenv('MONGODB_HOSTNAME', os.getenv('MONGODB_HOST', 'localhost'))  # Support both new and old names
+MONGODB_PORT = int(os.getenv('MONGODB_PORT', '27017'))
+MONGODB_DBNAME = os.getenv('MONGODB_DBNAME', os.getenv('MONGODB_DATABASE', 'taskdb'))  # Support both new and old names
+MONGODB_URI = os.getenv('MONGODB_URI', '')  # Fallback for backward compatibility
+
+
+# MongoDB connection pool tuning; unset variables keep the pymongo defaults.
+# The pool is per worker process and shared by its threads, so size it
+# against GUNICORN_THREADS (plus background threads), not the number of workers.
+MONGODB_POOL_OPTIONS = {
+    'maxPoolSize': os.getenv('MONGODB_MAX_POOL_SIZE'),
+    'minPoolSize': os.getenv('MONGODB_MIN_POOL_SIZE'),
+    'maxIdleTimeMS': os.getenv('MONGODB_MAX_IDLE_TIME_MS'),
+    'waitQueueTimeoutMS': os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS'),
+    'socketTimeoutMS': os.getenv('MONGODB_SOCKET_TIMEOUT_MS'),
+    'connectTimeoutMS': os.getenv('MONGODB_CONNECT_TIMEOUT_MS'),
+    'maxConnecting': os.getenv('MONGODB_MAX_CONNECTING'),
+}
+
+
+# MongoDB wire compression: comma-separated list in order of preference
+# (zstd, snappy, zlib), and the zlib level (-1 to 9) when zlib is used
+MONGODB_COMPRESSORS = os.getenv('MONGODB_COMPRESSORS', '')
+MONGODB_ZLIB_COMPRESSION_LEVEL = os.getenv('MONGODB_ZLIB_COMPRESSION_LEVEL', '')
+
+
+# Background purge of completed tasks (delete_all_tasks)
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', '1000'))
+PURGE_THROTTLE_MS = int(os.getenv('PURGE_THROTTLE_MS', '100'))
+
+
+# Background reconnect backoff (seconds) when a worker cannot reach MongoDB
+MONGODB_RECONNECT_MIN_DELAY = float(os.getenv('MONGODB_RECONNECT_MIN_DELAY', '1'))
+MONGODB_RECONNECT_MAX_DELAY = float(os.getenv('MONGODB_RECONNECT_MAX_DELAY', '30'))
+
+
+# Pod information for load balancing demonstration
+POD_NAME = os.getenv('HOSTNAME', 'local')
+POD_IP = os.getenv('POD_IP', 'localhost')
+
+
+# Task list pagination
+# TASKS_PAGE_SIZE is the default number of tasks per page; clients may ask for
+# a smaller or larger page with ?limit= up to TASKS_MAX_PAGE_SIZE.
+TASKS_PAGE_SIZE = int(os.getenv('TASKS_PAGE_SIZE', '50'))
+TASKS_MAX_PAGE_SIZE = int(os.getenv('TASKS_MAX_PAGE_SIZE', '500'))
+# Documents per cursor batch when /all streams the complete task list
+TASKS_STREAM_BATCH_SIZE = int(os.getenv('TASKS_STREAM_BATCH_SIZE', '500'))
+
+
+# MongoDB connection
+def get_connection_string():
+    """
+    Build the MongoDB connection string.
+    Supports two configuration methods (in priority order):
+    1. Individual variables: MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_HOSTNAME, MONGODB_PORT, MONGODB_DBNAME (recommended)
+    2. MONGODB_URI environment variable (fallback for backward compatibility)
+    """
+    # Method 1: Build connection string from individual variables (new primary method)
+    if MONGODB_USERNAME and MONGODB_PASSWORD and MONGODB_HOSTNAME:
+        logger.info(f"Using individual variables for authenticated connection to {MONGODB_HOSTNAME}:{MONGODB_PORT}")
+        return f"mongodb://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOSTNAME}:{MONGODB_PORT}/{MONGODB_DBNAME}?authSource=admin"
+    # Method 2: Use MONGODB_URI if provided and no individual variables (backward compatibility)
+    if MONGODB_URI:
+        logger.info("Using MONGODB_URI for connection (backward compatibility)")
+        return MONGODB_URI
+    # Method 3: Non-authenticated connection using hostname only (local development)
+    if MONGODB_HOSTNAME:
+        logger.info(f"Using non-authenticated connection to {MONGODB_HOSTNAME}:{MONGODB_PORT}")
+        return f"mongodb://{MONGODB_HOSTNAME}:{MONGODB_PORT}/{MONGODB_DBNAME}"
+    raise Exception("No MongoDB connection configuration found. Please set either individual variables (MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_HOSTNAME) or MONGODB_URI")
+
+
+def get_client_options():
+    """MongoClient keyword arguments from the pool and compression settings"""
+    client_options = {name: int(value) for name, value in MONGODB_POOL_OPTIONS.items() if value}
+    # Wire compression is negotiated with the server; compressors whose
+    # Python package is missing are dropped by pymongo with a warning
+    if MONGODB_COMPRESSORS:
+        client_options['compressors'] = MONGODB_COMPRESSORS
+        if MONGODB_ZLIB_COMPRESSION_LEVEL:
+            client_options['zlibCompressionLevel'] = int(MONGODB_ZLIB_COMPRESSION_LEVEL)
+    if client_options:
+        logger.info(f"MongoDB client options: {client_options}")
+    return client_options
+
+
+# Keyset pagination helpers
+# Tasks are ordered newest first on (created_at, _id). A page cursor is the
+# (created_at, _id) pair of a boundary task, encoded as an opaque URL-safe token,
+# so fetching any page is an index range scan of page_size + 1 documents no
+# matter how deep into the list the page is.
+def encode_cursor(task):
+    """Encode the (created_at, _id) sort key of a task as a page token"""
+    raw = f"{task['created_at'].isoformat()}|{task['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a page token into a (created_at, _id) tuple, or None if invalid"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, task_id = base64.urlsafe_b64decode(padded).decode().split('|', 1)
+        return datetime.fromisoformat(created_at), ObjectId(task_id)
+    except (ValueError, InvalidId, UnicodeDecodeError):
+        return None
+
+
+def parse_page_size(value):
+    """Parse a requested page size, clamped to the configured bounds"""
+    try:
+        limit = int(value) if value is not None else TASKS_PAGE_SIZE
+    except ValueError:
+        limit = TASKS_PAGE_SIZE
+    return max(1, min(limit, TASKS_MAX_PAGE_SIZE))
+
+
+def build_page_query(after=None, before=None):
+    """
+    Build the (filter, sort) pair for one page of tasks.
+    `after` selects the tasks older than the given cursor (next page),
+    `before` selects the tasks newer than the given cursor (previous page).
+    """
+    if before is not None:
+        created_at, task_id = before
+        query = {'$or': [
+            {'created_at': {'$gt': created_at}},
+            {'created_at': created_at, '_id': {'$gt': task_id}}
+        ]}
+        return query, {'created_at': 1, '_id': 1}
+    if after is not None:
+        created_at, task_id = after
+        query = {'$or': [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': task_id}}
+        ]}
+        return query, {'created_at': -1, '_id': -1}
+    return {}, {'created_at': -1, '_id': -1}
+
+
+def finish_page(tasks, after=None, before=None, page_size=TASKS_PAGE_SIZE):
+    """
+    Trim a page fetched with page_size + 1 documents and work out its cursors.
+    Returns (tasks, next_cursor, prev_cursor); a cursor is None when there is no
+    page in that direction.
+    """
+    has_more = len(tasks) > page_size
+    tasks = tasks[:page_size]
+
+    if before is not None:
+        tasks.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = after is not None, has_more
+
+    next_cursor = encode_cursor(tasks[-1]) if tasks and has_older else None
+    prev_cursor = encode_cursor(tasks[0]) if tasks and has_newer else None
+    return tasks, next_cursor, prev_cursor
+
+
+# Task statistics (task_stats document, see app.py)
+TASK_STATS_ID = 'tasks'
+
+
+# Counts both counters in one aggregation; $count emits no document at all
+# for an empty input, so missing entries mean zero
+TASK_COUNTS_PIPELINE = [
+    {'$facet': {
+        'total': [{'$count': 'count'}],
+        'completed': [{'$match': {'completed': True}}, {'$count': 'count'}]
+    }}
+]
+
+
+def reconciled_stats_update(counts):
+    """Build the task_stats update that stores the result of TASK_COUNTS_PIPELINE"""
+    return {
+        '$set': {
+            'total': counts['total'][0]['count'] if counts.get('total') else 0,
+            'completed': counts['completed'][0]['count'] if counts.get('completed') else 0,
+            'reconciled_at': datetime.utcnow(),
+            'reconciled_by_pod': POD_NAME
+        },
+        '$inc': {'version': 1}
+    }
+
+
+def new_task(title):
+    """Build a new task document stamped with this pod"""
+    return {
+        'title': title,
+        'completed': False,
+        'created_at': datetime.utcnow(),
+        'created_by_pod': POD_NAME
+    }
+
+
+def purge_status_json(job):
+    """Serializable view of a purge job document"""
+    return {
+        'status': job.get('status'),
+        'deleted': job.get('deleted', 0),
+        'batches': job.get('batches', 0),
+        'last_id': str(job['last_id']) if job.get('last_id') else None,
+        'pod': job.get('pod'),
+        'started_at': job['started_at'].isoformat() if job.get('started_at') else None,
+        'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None,
+        'error': job.get('error')
+    }
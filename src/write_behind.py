@@ -0,0 +1,152 @@
+"""
+Write-behind queue for task creation.
+Requests hand new documents to a bounded in-process queue and return at once;
+a background thread coalesces them into unordered insert_many calls every
+flush interval or batch size, whichever comes first. Anything still queued is
+flushed when the process exits (gunicorn runs atexit handlers when a worker
+shuts down on SIGTERM).
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """The write-behind queue is at capacity; the caller should shed the write"""
+
+
+class WriteBehindQueue:
+    """Bounded queue of documents flushed to a collection with insert_many"""
+
+    def __init__(self, collection, on_flush=None, max_queue=10000, batch_size=500,
+                 flush_interval_ms=50, enqueue_timeout_ms=100, max_retries=3):
+        self.collection = collection
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.enqueue_timeout = enqueue_timeout_ms / 1000
+        self.max_retries = max_retries
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = None
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the flusher thread and flush the remainder at interpreter exit"""
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self._thread
+
+    def submit(self, document):
+        """
+        Queue a document for insertion.
+        Waits up to enqueue_timeout_ms for room, then raises QueueFull.
+        """
+        try:
+            self._queue.put(document, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFull('Write-behind queue is full')
+        self.enqueued += 1
+
+    def close(self, timeout=10):
+        """Stop the flusher thread and write out everything still queued"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # Anything the flusher did not get to before stopping
+        while not self._queue.empty():
+            self._flush(self._drain(wait=False))
+        logger.info(f"Write-behind queue closed after flushing {self.flushed} documents")
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain(wait=True)
+            if batch:
+                self._flush(batch)
+
+    def _drain(self, wait):
+        """Collect up to batch_size documents, waiting at most one flush interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if wait and remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        """Insert one batch, retrying transient failures"""
+        if not batch:
+            return
+        start = time.perf_counter()
+        inserted = 0
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.collection.insert_many(batch, ordered=False)
+                inserted = len(batch)
+                break
+            except BulkWriteError as e:
+                # Per-document errors are final. On a retry, duplicate _id errors
+                # mean the failed attempt had already written that document.
+                errors = e.details.get('writeErrors', [])
+                duplicates = sum(1 for error in errors if error.get('code') == 11000) if attempt > 1 else 0
+                inserted = e.details.get('nInserted', 0) + duplicates
+                if len(errors) > duplicates:
+                    logger.error(f"Write-behind flush had {len(errors) - duplicates} write errors")
+                break
+            except PyMongoError as e:
+                logger.warning(f"Write-behind flush attempt {attempt} failed: {e}")
+                if attempt < self.max_retries:
+                    time.sleep(0.1 * 2 ** attempt)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.flushed += inserted
+        self.failed += len(batch) - inserted
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+        if inserted < len(batch):
+            logger.error(f"Write-behind dropped {len(batch) - inserted} of {len(batch)} documents")
+        if inserted and self.on_flush is not None:
+            try:
+                self.on_flush(inserted)
+            except Exception as e:
+                logger.error(f"Write-behind flush callback failed: {e}")
+
+    def metrics(self):
+        """Return the queue counters as a dict"""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'enqueued': self.enqueued,
+            'rejected': self.rejected,
+            'flushed': self.flushed,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'last_flush_ms': self.last_flush_ms,
+            'avg_flush_ms': self.total_flush_ms / self.flushes if self.flushes else None,
+            'max_flush_ms': self.max_flush_ms
+        }
@@ -0,0 +1,135 @@
+"""
+Tests for the adaptive concurrency limiter: priority classes and how the
+limit follows latency samples.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from admission import CRITICAL, LOW, NORMAL, AdaptiveLimiter  # noqa: E402
+
+
+def drive(limiter, latency, concurrency, requests):
+    """
+    Complete `requests` requests of `latency` seconds each from `concurrency`
+    closed-loop clients; requests over the limit are shed and retried
+    """
+    held = sum(limiter.try_acquire() for _ in range(concurrency))
+    for _ in range(requests):
+        if held:
+            limiter.release(latency)
+            held -= 1
+        held += sum(limiter.try_acquire() for _ in range(concurrency - held))
+    for _ in range(held):
+        limiter.release(latency, sample=False)
+
+
+class PriorityTest(unittest.TestCase):
+
+    def test_normal_requests_fill_the_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=4)
+        self.assertEqual([limiter.try_acquire(NORMAL) for _ in range(5)], [True] * 4 + [False])
+        self.assertEqual(limiter.stats()['shed'], {NORMAL: 1, LOW: 0})
+
+    def test_low_priority_gets_a_share_of_the_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=4, low_priority_share=0.75)
+        self.assertEqual([limiter.try_acquire(LOW) for _ in range(4)], [True] * 3 + [False])
+        # The remaining slot is still open to normal requests
+        self.assertTrue(limiter.try_acquire(NORMAL))
+
+    def test_low_priority_always_gets_one_slot(self):
+        limiter = AdaptiveLimiter(initial_limit=1, min_limit=1, low_priority_share=0.5)
+        self.assertTrue(limiter.try_acquire(LOW))
+
+    def test_critical_requests_are_always_admitted(self):
+        limiter = AdaptiveLimiter(initial_limit=2)
+        for _ in range(2):
+            limiter.try_acquire(NORMAL)
+        self.assertTrue(all(limiter.try_acquire(CRITICAL) for _ in range(10)))
+        self.assertEqual(limiter.stats()['in_flight'], 12)
+
+    def test_release_frees_the_slot(self):
+        limiter = AdaptiveLimiter(initial_limit=2)
+        limiter.try_acquire()
+        limiter.try_acquire()
+        self.assertFalse(limiter.try_acquire())
+        limiter.release(0.01)
+        self.assertTrue(limiter.try_acquire())
+
+    def test_initial_limit_is_clamped(self):
+        self.assertEqual(AdaptiveLimiter(initial_limit=500, max_limit=10).limit, 10)
+        self.assertEqual(AdaptiveLimiter(initial_limit=1, min_limit=2).limit, 2)
+        # A max below the min wins, so a small thread pool is never over-admitted
+        self.assertEqual(AdaptiveLimiter(initial_limit=20, min_limit=4, max_limit=3).limit, 3)
+
+
+class GradientTest(unittest.TestCase):
+
+    def test_steady_latency_under_load_grows_the_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=10, max_limit=50)
+        drive(limiter, 0.010, concurrency=10, requests=200)
+        self.assertGreater(limiter.limit, 10)
+
+    def test_limit_stops_at_max_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=10, max_limit=12)
+        drive(limiter, 0.010, concurrency=10, requests=500)
+        self.assertEqual(limiter.limit, 12)
+
+    def test_app_limited_worker_keeps_its_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=20)
+        drive(limiter, 0.010, concurrency=2, requests=200)
+        self.assertEqual(limiter.limit, 20)
+
+    def test_latency_rise_shrinks_the_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=20, max_limit=20)
+        drive(limiter, 0.010, concurrency=15, requests=200)
+        drive(limiter, 0.200, concurrency=15, requests=50)
+        self.assertLess(limiter.limit, 10)
+        stats = limiter.stats()
+        self.assertGreater(stats['latency_recent_ms'], stats['latency_baseline_ms'] * 2)
+
+    def test_limit_stops_at_min_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=20, min_limit=3)
+        drive(limiter, 0.010, concurrency=15, requests=100)
+        drive(limiter, 1.0, concurrency=15, requests=100)
+        self.assertEqual(limiter.limit, 3)
+
+    def test_limit_recovers_after_slowdown(self):
+        limiter = AdaptiveLimiter(initial_limit=20, max_limit=20, min_limit=2)
+        drive(limiter, 0.010, concurrency=15, requests=200)
+        drive(limiter, 0.200, concurrency=15, requests=100)
+        slowed = limiter.limit
+        # Few requests fit under a shrunken limit, so it must grow while the worker is full
+        drive(limiter, 0.010, concurrency=max(2, int(slowed)), requests=500)
+        self.assertGreater(limiter.limit, slowed)
+
+    def test_rise_within_noise_floor_is_ignored(self):
+        limits = {}
+        for noise_floor in (0, 0.005):
+            limiter = AdaptiveLimiter(initial_limit=10, max_limit=10, noise_floor=noise_floor)
+            drive(limiter, 0.0005, concurrency=10, requests=200)
+            # Latency triples, but by less than the noise floor
+            drive(limiter, 0.0015, concurrency=10, requests=30)
+            limits[noise_floor] = limiter.limit
+        self.assertEqual(limits[0.005], 10)
+        self.assertLess(limits[0], 5)
+
+    def test_one_slow_request_does_not_move_the_limit_much(self):
+        limiter = AdaptiveLimiter(initial_limit=20, max_limit=20)
+        drive(limiter, 0.010, concurrency=15, requests=200)
+        drive(limiter, 0.500, concurrency=15, requests=1)
+        self.assertGreaterEqual(limiter.limit, 18)
+
+    def test_unsampled_releases_leave_latency_alone(self):
+        limiter = AdaptiveLimiter()
+        limiter.try_acquire()
+        limiter.release(5.0, sample=False)
+        stats = limiter.stats()
+        self.assertIsNone(stats['latency_recent_ms'])
+        self.assertEqual(stats['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for archiving an exited worker's Prometheus multiprocess files: the
+merged totals must not change and the worker's files must go away.
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from prometheus_client import CollectorRegistry, multiprocess
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from metrics import archive_dead_worker  # noqa: E402
+
+
+def write_samples(directory, filename, samples):
+    """Write {(metric name, sample name, endpoint): value} the way a worker would"""
+    values = MmapedDict(os.path.join(directory, filename))
+    try:
+        for (metric, name, endpoint), value in samples.items():
+            values.write_value(mmap_key(metric, name, ['endpoint'], [endpoint], 'help'), value, 0.0)
+    finally:
+        values.close()
+
+
+def totals(directory):
+    """Merged sample values of every worker's files, keyed like write_samples"""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=directory)
+    return {(metric.name, sample.name, sample.labels['endpoint']): sample.value
+            for metric in registry.collect() for sample in metric.samples}
+
+
+class ArchiveDeadWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        patcher = mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': self.directory})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_totals_are_kept_and_files_removed(self):
+        write_samples(self.directory, 'counter_101.db', {('requests', 'requests_total', 'index'): 3.0})
+        write_samples(self.directory, 'counter_102.db', {('requests', 'requests_total', 'index'): 4.0,
+                                                         ('requests', 'requests_total', 'health'): 1.0})
+        write_samples(self.directory, 'gauge_livesum_101.db', {('busy', 'busy', 'index'): 1.0})
+        before = totals(self.directory)
+        del before[('busy', 'busy', 'index')]
+
+        archive_dead_worker(101)
+        self.assertEqual(totals(self.directory), before)
+        archive_dead_worker(102)
+        self.assertEqual(totals(self.directory), before)
+        self.assertEqual(sorted(f for f in os.listdir(self.directory) if f.endswith('.db')),
+                         ['counter_archive.db'])
+
+    def test_other_workers_files_are_left_alone(self):
+        write_samples(self.directory, 'counter_11.db', {('requests', 'requests_total', 'index'): 1.0})
+        write_samples(self.directory, 'counter_1.db', {('requests', 'requests_total', 'index'): 2.0})
+        archive_dead_worker(1)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'counter_11.db')))
+        self.assertEqual(totals(self.directory), {('requests', 'requests_total', 'index'): 3.0})
+
+    def test_without_multiprocess_directory_does_nothing(self):
+        write_samples(self.directory, 'counter_7.db', {('requests', 'requests_total', 'index'): 1.0})
+        with mock.patch.dict(os.environ, clear=True):
+            archive_dead_worker(7)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'counter_7.db')))
+
+
+if __name__ == '__main__':
+    unittest.main()
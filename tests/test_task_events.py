@@ -0,0 +1,224 @@
+"""
+Tests for the live event hub: the ring buffer arithmetic of position() and
+wait(), and how change stream events are turned into published events,
+driven by a scripted change stream instead of a replica set.
+"""
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from task_events import TaskEventHub  # noqa: E402
+from task_mirror import StreamEnded  # noqa: E402
+
+
+class ScriptedStream:
+    """Change stream stand-in returning the scripted changes, then closing"""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def alive(self):
+        return bool(self.changes)
+
+    def try_next(self):
+        change = self.changes.pop(0)
+        if isinstance(change, Exception):
+            raise change
+        self.resume_token = change['_id']
+        return change
+
+
+class ScriptedDatabase:
+    """Database stand-in whose watch() hands out the scripted streams in turn"""
+
+    def __init__(self, *streams, on_exhausted=None):
+        self.streams = list(streams)
+        self.resume_after = []
+        self.on_exhausted = on_exhausted
+
+    def watch(self, pipeline, resume_after=None, **kwargs):
+        self.resume_after.append(resume_after)
+        if not self.streams:
+            self.on_exhausted()
+            return ScriptedStream([])
+        return ScriptedStream(self.streams.pop(0))
+
+
+def change(token, operation, coll='tasks', document=None, document_id=None):
+    document_id = document_id or (document['_id'] if document else ObjectId())
+    return {
+        '_id': {'_data': token},
+        'operationType': operation,
+        'ns': {'db': 'taskdb', 'coll': coll},
+        'documentKey': {'_id': document_id},
+        'fullDocument': document
+    }
+
+
+def task(title='Task', completed=False):
+    return {'_id': ObjectId(), 'title': title, 'completed': completed,
+            'created_at': datetime(2024, 1, 1, 12, 0), 'created_by_pod': 'pod-a'}
+
+
+class RingBufferTest(unittest.TestCase):
+
+    def hub_with_events(self, count, buffer_size=10):
+        hub = TaskEventHub(None, 'tasks', buffer_size=buffer_size)
+        for i in range(1, count + 1):
+            hub._publish(f'token-{i}', 'stats', {'total': i})
+        return hub
+
+    def test_position_without_last_event_id_starts_at_newest(self):
+        hub = self.hub_with_events(3)
+        self.assertEqual(hub.position(), (3, 'token-3', True))
+
+    def test_position_on_empty_hub(self):
+        hub = TaskEventHub(None, 'tasks')
+        self.assertEqual(hub.position(), (0, None, True))
+        self.assertEqual(hub.position('token-1'), (0, None, False))
+
+    def test_position_resumes_after_buffered_event(self):
+        hub = self.hub_with_events(3)
+        self.assertEqual(hub.position('token-1'), (1, 'token-1', True))
+        events, missed = hub.wait(1, timeout=0)
+        self.assertFalse(missed)
+        self.assertEqual([event[1] for event in events], ['token-2', 'token-3'])
+
+    def test_position_of_evicted_event_is_not_resumed(self):
+        hub = self.hub_with_events(5, buffer_size=3)
+        self.assertEqual(hub.position('token-1'), (5, 'token-5', False))
+
+    def test_position_skips_events_without_id(self):
+        hub = self.hub_with_events(2)
+        hub._publish(None, 'reset', {})
+        self.assertEqual(hub.position(), (3, 'token-2', True))
+
+    def test_wait_times_out_without_new_events(self):
+        hub = self.hub_with_events(2)
+        self.assertEqual(hub.wait(2, timeout=0.01), ([], False))
+
+    def test_wait_reports_events_that_left_the_buffer(self):
+        hub = self.hub_with_events(5, buffer_size=3)
+        # Events 3 to 5 are buffered: a reader at 2 has missed nothing, one at 1 has
+        events, missed = hub.wait(2, timeout=0)
+        self.assertFalse(missed)
+        self.assertEqual([event[0] for event in events], [3, 4, 5])
+        self.assertEqual(hub.wait(1, timeout=0), ([], True))
+
+    def test_wait_wakes_on_publish(self):
+        hub = self.hub_with_events(1)
+        timer = threading.Timer(0.05, hub._publish, ('token-2', 'stats', {}))
+        timer.start()
+        events, missed = hub.wait(1, timeout=5)
+        timer.join()
+        self.assertEqual([event[1] for event in events], ['token-2'])
+        self.assertFalse(missed)
+
+    def test_wait_returns_when_stopped(self):
+        hub = self.hub_with_events(1)
+        threading.Timer(0.05, hub.stop).start()
+        self.assertEqual(hub.wait(1, timeout=5), ([], False))
+
+    def test_subscriber_limit(self):
+        hub = TaskEventHub(None, 'tasks', max_subscribers=2)
+        self.assertTrue(hub.subscribe())
+        self.assertTrue(hub.subscribe())
+        self.assertFalse(hub.subscribe())
+        hub.unsubscribe()
+        self.assertTrue(hub.subscribe())
+        self.assertEqual(hub.metrics()['rejected'], 1)
+
+
+class ChangeStreamTest(unittest.TestCase):
+
+    def published(self, hub):
+        return [(event_id, name) for _, event_id, name, _ in hub._events]
+
+    def test_changes_become_events(self):
+        created, updated = task('New'), task('Done', completed=True)
+        database = ScriptedDatabase([
+            change('1', 'insert', document=created),
+            change('2', 'update', document=updated),
+            change('3', 'delete', document_id=created['_id']),
+            change('4', 'update', coll='task_stats',
+                   document={'_id': 'tasks', 'total': 5, 'completed': 2}),
+            change('5', 'update', coll='task_stats', document={'_id': 'other', 'total': 1}),
+            change('6', 'update', document=None)
+        ])
+        hub = TaskEventHub(database, 'tasks')
+        hub._follow()
+        self.assertEqual(self.published(hub), [('1', 'task-created'), ('2', 'task-updated'),
+                                               ('3', 'task-deleted'), ('4', 'stats')])
+        self.assertEqual(hub.resume_token, {'_data': '6'})
+        data = [data for _, _, _, data in hub._events]
+        self.assertIn('"title": "New"', data[0])
+        self.assertIn('"created_at": "2024-01-01T12:00:00"', data[0])
+        self.assertIn(f'"id": "{created["_id"]}"', data[2])
+        self.assertIn('"pending": 3', data[3])
+
+    def test_drop_publishes_reset_and_keeps_following(self):
+        database = ScriptedDatabase([change('1', 'drop'), change('2', 'insert', document=task())])
+        hub = TaskEventHub(database, 'tasks')
+        hub._follow()
+        self.assertEqual(self.published(hub), [('1', 'reset'), ('2', 'task-created')])
+
+    def test_invalidate_publishes_reset_and_ends_stream(self):
+        database = ScriptedDatabase([change('1', 'invalidate'), change('2', 'insert', document=task())])
+        hub = TaskEventHub(database, 'tasks')
+        with self.assertRaises(StreamEnded):
+            hub._follow()
+        self.assertEqual(self.published(hub), [('1', 'reset')])
+        self.assertIsNone(hub.resume_token)
+
+    def run_until_exhausted(self, *streams):
+        """Run the hub's retry loop over the scripted streams, stopping after the last"""
+        hub = TaskEventHub(None, 'tasks', retry_delay=0.001, max_retry_delay=0.001)
+        hub.database = ScriptedDatabase(*streams, on_exhausted=hub.stop)
+        hub._run()
+        return hub
+
+    def test_lost_history_resets_clients_and_resume_token(self):
+        with self.assertLogs('task_events', level='WARNING'):
+            hub = self.run_until_exhausted(
+                [change('1', 'insert', document=task())],
+                [OperationFailure('Resume of change stream was not possible', code=286)])
+        self.assertEqual(self.published(hub), [('1', 'task-created'), (None, 'reset')])
+        # Resumed after event 1, then reopened from now after the history was lost
+        self.assertEqual(hub.database.resume_after, [None, {'_data': '1'}, None])
+
+    def test_transient_error_resumes_from_token(self):
+        with self.assertLogs('task_events', level='WARNING'):
+            hub = self.run_until_exhausted(
+                [change('1', 'insert', document=task()), OperationFailure('Interrupted', code=11601)],
+                [change('2', 'insert', document=task())])
+        self.assertEqual(self.published(hub), [('1', 'task-created'), ('2', 'task-created')])
+        self.assertEqual(hub.database.resume_after, [None, {'_data': '1'}, {'_data': '2'}])
+
+    def test_unexpected_error_keeps_thread_running(self):
+        bad = task()
+        bad['created_at'] = 'not a date'
+        with self.assertLogs('task_events', level='ERROR'):
+            hub = self.run_until_exhausted(
+                [change('1', 'insert', document=bad)],
+                [change('2', 'insert', document=task())])
+        self.assertEqual(self.published(hub), [(None, 'reset'), ('2', 'task-created')])
+        self.assertEqual(hub.database.resume_after, [None, None, {'_data': '2'}])
+
+
+if __name__ == '__main__':
+    unittest.main()